@@ -1,26 +1,85 @@
 from __future__ import annotations
 
+import asyncio
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, PLATFORMS
+from .const import DOMAIN, PLATFORMS, DATA_POOL, DATA_SCHEDULER, STORAGE_VERSION
 from .coordinator import AnkerSolixCoordinator
+from .modbus_client import ConnectionPool
+from .scheduler import FleetScheduler
+from .services import async_setup_services
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    coordinator = AnkerSolixCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    scheduler: FleetScheduler | None = domain_data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = domain_data[DATA_SCHEDULER] = FleetScheduler(hass)
+    pool: ConnectionPool = domain_data.setdefault(DATA_POOL, ConnectionPool())
+
+    coordinator = AnkerSolixCoordinator(hass, entry, limiter=scheduler.limiter, pool=pool)
+    first_refresh: asyncio.Task | None = None
+    try:
+        if await coordinator.async_restore():
+            # Entities come up with the persisted snapshot; the first live
+            # refresh (TCP connect included) runs alongside platform setup.
+            first_refresh = entry.async_create_background_task(
+                hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {entry.entry_id}"
+            )
+        else:
+            await coordinator.async_config_entry_first_refresh()
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+        domain_data[entry.entry_id] = coordinator
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        # Read plans follow the entity registry: disabled entities are not polled.
+        # Subscribed first, so entities registered by the platforms count too.
+        entry.async_on_unload(coordinator.async_track_entity_registry())
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except Exception:
+        # Setup is retried from scratch (ConfigEntryNotReady): give the pooled
+        # connection back, or every retry leaks a reference and its monitor.
+        if first_refresh is not None:
+            first_refresh.cancel()
+        domain_data.pop(entry.entry_id, None)
+        await coordinator.client.close()
+        if pool.empty:
+            domain_data.pop(DATA_POOL, None)
+        if scheduler.empty:
+            domain_data.pop(DATA_SCHEDULER, None)
+        raise
+    scheduler.register(entry.entry_id, coordinator)
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
+        domain_data = hass.data[DOMAIN]
+        scheduler: FleetScheduler | None = domain_data.get(DATA_SCHEDULER)
+        if scheduler is not None:
+            scheduler.unregister(entry.entry_id)
+            if scheduler.empty:
+                domain_data.pop(DATA_SCHEDULER)
+        coordinator = domain_data.pop(entry.entry_id, None)
         if coordinator is not None:
             await coordinator.client.close()
+        pool: ConnectionPool | None = domain_data.get(DATA_POOL)
+        if pool is not None and pool.empty:
+            domain_data.pop(DATA_POOL)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
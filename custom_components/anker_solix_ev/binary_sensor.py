@@ -25,6 +25,7 @@ async def async_setup_entry(
 
 class _FlagBinarySensor(BinarySensorEntity):
     _attr_has_entity_name = True
+    _attr_should_poll = False
 
     def __init__(self, coordinator: AnkerSolixCoordinator, entry: ConfigEntry, name: str, key: str):
         self.coordinator = coordinator
@@ -36,6 +37,14 @@ class _FlagBinarySensor(BinarySensorEntity):
     def unique_id(self):
         return f"{self.entry.entry_id}_{self._key}"
 
+    @property
+    def available(self):
+        return self.coordinator.last_update_success
+
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.key_attributes(self._key)
+
     @property
     def is_on(self):
         val = self.coordinator.data.get(self._key)
@@ -44,4 +53,6 @@ class _FlagBinarySensor(BinarySensorEntity):
         return int(val) == 1
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        self.async_on_remove(
+            self.coordinator.async_add_key_listener((self._key,), self.async_write_ha_state)
+        )
@@ -34,7 +34,7 @@ class StartChargeButton(_Base):
 
     async def async_press(self) -> None:
         await self.coordinator.client.write_u16(REG_COMMAND, 1)
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.async_read_back(REG_COMMAND)
 
 
 class StopChargeButton(_Base):
@@ -46,4 +46,4 @@ class StopChargeButton(_Base):
 
     async def async_press(self) -> None:
         await self.coordinator.client.write_u16(REG_COMMAND, 2)
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.async_read_back(REG_COMMAND)
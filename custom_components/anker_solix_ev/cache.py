@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Mapping, Tuple
+
+Payload = bytes | memoryview
+
+
+class RegisterCache:
+    """Read-through cache of register words with a TTL per register.
+
+    A read is served from the cache when every register it covers is
+    younger than its TTL (or `max_age`, when given). Otherwise it joins an
+    in-flight read covering the same registers, or starts one that later
+    callers can join. Writes invalidate the registers they touch.
+    """
+
+    def __init__(self, ttls: Mapping[int, float] | None = None, default_ttl: float = 0.0):
+        self._ttls: Dict[int, float] = dict(ttls or {})
+        self._default_ttl = float(default_ttl)
+        self._words: Dict[int, Tuple[bytes, float]] = {}
+        self._inflight: Dict[Tuple[int, int], asyncio.Task] = {}
+        self._generation = 0  # bumped by invalidate(); stale in-flight reads are not stored
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get(self, start: int, quantity: int, max_age: float | None, now: float) -> bytes | None:
+        parts = []
+        for register in range(start, start + quantity):
+            entry = self._words.get(register)
+            ttl = self._ttls.get(register, self._default_ttl) if max_age is None else max_age
+            if entry is None or ttl <= 0 or now - entry[1] > ttl:
+                return None
+            parts.append(entry[0])
+        return b"".join(parts)
+
+    def put(self, start: int, payload: Payload, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        for i in range(len(payload) // 2):
+            self._words[start + i] = (bytes(payload[2 * i:2 * i + 2]), now)
+
+    def invalidate(self, start: int, quantity: int = 1) -> None:
+        self._generation += 1
+        for register in range(start, start + quantity):
+            self._words.pop(register, None)
+
+    def _joinable(self, start: int, quantity: int) -> Tuple[int, asyncio.Task] | None:
+        for (f_start, f_qty), task in self._inflight.items():
+            if f_start <= start and start + quantity <= f_start + f_qty:
+                return f_start, task
+        return None
+
+    async def read(
+        self,
+        start: int,
+        quantity: int,
+        fetch: Callable[[], Awaitable[Payload]],
+        max_age: float | None = None,
+    ) -> Payload:
+        cached = self._get(start, quantity, max_age, time.monotonic())
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        joinable = None if max_age == 0 else self._joinable(start, quantity)
+        if joinable is not None:
+            self.coalesced += 1
+            f_start, task = joinable
+            payload = await asyncio.shield(task)
+            offset = 2 * (start - f_start)
+            return payload[offset:offset + 2 * quantity]
+
+        self.misses += 1
+        key = (start, quantity)
+        generation = self._generation
+        # The read runs as its own task so joined callers still get the
+        # result if the caller that started it is cancelled.
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+
+        def _done(done: asyncio.Task) -> None:
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+            if not done.cancelled() and done.exception() is None and generation == self._generation:
+                self.put(start, done.result())
+
+        task.add_done_callback(_done)
+        return await asyncio.shield(task)
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+            "registers": len(self._words),
+        }
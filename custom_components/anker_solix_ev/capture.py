@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Deque, Dict, List, NamedTuple, Tuple
+
+from .codec import MBAP_HEADER_LEN, FrameDecoder, FrameEncoder, FrameError
+
+CAPTURE_MAGIC = b"ANKRCAP1"
+_RECORD = struct.Struct("<dBH")  # wall-clock time, kind, payload length
+
+KIND_OPEN = 0  # connection opened; payload "host:port"
+KIND_TX = 1  # one request frame as written
+KIND_RX = 2  # bytes as received (may hold partial or several frames)
+KIND_LOST = 3  # connection lost or closed; payload is the reason
+
+_GATEWAY_NO_RESPONSE = 0x0B
+
+
+class CaptureRecord(NamedTuple):
+    time: float
+    kind: int
+    data: bytes
+
+
+class CaptureWriter:
+    """Appends timestamped frames to a binary capture file.
+
+    Records are buffered in memory and written by a single worker thread,
+    so the event loop never blocks on the file and records stay in order.
+    """
+
+    def __init__(self, path: str, flush_bytes: int = 16384):
+        self.path = path
+        self._flush_bytes = flush_bytes
+        self._buf = bytearray()
+        self._file: BinaryIO | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anker_capture")
+        self.records = 0
+
+    def record(self, kind: int, data: bytes | memoryview = b"") -> None:
+        self._buf += _RECORD.pack(time.time(), kind, len(data))
+        self._buf += data
+        self.records += 1
+        if len(self._buf) >= self._flush_bytes:
+            self._flush()
+
+    def _flush(self) -> asyncio.Future:
+        chunk, self._buf = bytes(self._buf), bytearray()
+        return asyncio.get_running_loop().run_in_executor(self._executor, self._write, chunk)
+
+    def _write(self, chunk: bytes) -> None:
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            if self._file.tell() == 0:
+                self._file.write(CAPTURE_MAGIC)
+        self._file.write(chunk)
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        await self._flush()
+        await loop.run_in_executor(self._executor, self._close_file)
+        self._executor.shutdown(wait=False)
+
+
+def read_capture(path: str) -> List[CaptureRecord]:
+    with open(path, "rb") as f:
+        raw = f.read()
+    if not raw.startswith(CAPTURE_MAGIC):
+        raise ValueError(f"Not a Modbus capture file: {path}")
+    records: List[CaptureRecord] = []
+    pos = len(CAPTURE_MAGIC)
+    while pos + _RECORD.size <= len(raw):
+        t, kind, length = _RECORD.unpack_from(raw, pos)
+        pos += _RECORD.size
+        if pos + length > len(raw):
+            break  # truncated tail of a capture that was not closed
+        records.append(CaptureRecord(t, kind, raw[pos:pos + length]))
+        pos += length
+    return records
+
+
+@dataclass
+class _Outcome:
+    """What the device did with one captured request."""
+
+    tid: int
+    sent: float  # seconds since the first record
+    answered: float | None = None  # when the response (or the connection loss) came
+    frames: List[Tuple[int, int, bytes]] = field(default_factory=list)  # response plus stray frames
+    lost: bool = False
+
+
+class ReplayLog:
+    """Answers requests from a capture instead of a device.
+
+    Used as `ModbusSettings.replay`, it replaces the TCP connection under
+    the regular transport, so parsing, TID routing, timeouts, retries and
+    reconnects run as they would live. Each request is matched to the next
+    unanswered capture of the same unit and PDU and gets what the device
+    sent back then: the response (re-addressed to the live TID), late
+    frames for other TIDs, silence, or a dropped connection. With
+    `speed` > 0 answers are held back to the captured timeline scaled by
+    `speed`; 0 replays as fast as possible. Requests missing from the
+    capture get a Modbus "gateway target failed to respond" exception.
+    """
+
+    def __init__(self, records: List[CaptureRecord], speed: float = 1.0):
+        self.speed = float(speed)
+        self._requests: Dict[Tuple[int, bytes], Deque[_Outcome]] = collections.defaultdict(collections.deque)
+        self.total = 0
+        self.matched = 0
+        self.unmatched = 0
+        self._start: float | None = None
+        self._index(records)
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 1.0) -> ReplayLog:
+        return cls(read_capture(path), speed)
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.matched
+
+    def _index(self, records: List[CaptureRecord]) -> None:
+        if not records:
+            return
+        t0 = records[0].time
+        by_tid: Dict[int, _Outcome] = {}
+        last: _Outcome | None = None
+        decoder = FrameDecoder()
+        for rec in records:
+            at = rec.time - t0
+            if rec.kind == KIND_TX and len(rec.data) > MBAP_HEADER_LEN:
+                tid = int.from_bytes(rec.data[0:2], "big")
+                unit, pdu = rec.data[6], bytes(rec.data[MBAP_HEADER_LEN:])
+                last = by_tid[tid] = _Outcome(tid, at)
+                self._requests[(unit, pdu)].append(last)
+                self.total += 1
+            elif rec.kind == KIND_RX:
+                try:
+                    frames = decoder.feed(rec.data)
+                except FrameError:
+                    frames, rec = [], CaptureRecord(rec.time, KIND_LOST, b"")
+                for frame in frames:
+                    outcome = by_tid.pop(frame[0], None)
+                    target = outcome or last  # strays arrive with the request in flight
+                    if target is not None:
+                        target.frames.append(frame)
+                        if outcome is not None:
+                            outcome.answered = at
+            if rec.kind in (KIND_OPEN, KIND_LOST):
+                for outcome in by_tid.values():
+                    if rec.kind == KIND_LOST and outcome.answered is None:
+                        outcome.lost, outcome.answered = True, at
+                by_tid.clear()
+                decoder = FrameDecoder()
+
+    def connect(self, protocol: asyncio.BufferedProtocol) -> ReplayTransport:
+        transport = ReplayTransport(self, protocol)
+        protocol.connection_made(transport)
+        return transport
+
+    def _delay(self, outcome: _Outcome) -> float:
+        if self.speed <= 0 or outcome.answered is None:
+            return 0.0
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now - outcome.sent / self.speed
+        due = self._start + outcome.answered / self.speed
+        return max(due - now, (outcome.answered - outcome.sent) / self.speed)
+
+    def _next(self, unit: int, pdu: bytes) -> _Outcome | None:
+        queue = self._requests.get((unit, pdu))
+        if not queue:
+            self.unmatched += 1
+            return None
+        self.matched += 1
+        return queue.popleft()
+
+
+class ReplayTransport(asyncio.Transport):
+    """Transport handed to the protocol by ReplayLog; writes are answered from the capture."""
+
+    def __init__(self, log: ReplayLog, protocol: asyncio.BufferedProtocol):
+        super().__init__()
+        self._log = log
+        self._protocol = protocol
+        self._encoder = FrameEncoder()
+        self._closing = False
+
+    def get_extra_info(self, name: str, default=None):
+        return default
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def write(self, data: bytes) -> None:
+        if self._closing:
+            return
+        tid, unit, pdu = int.from_bytes(data[0:2], "big"), data[6], bytes(data[MBAP_HEADER_LEN:])
+        outcome = self._log._next(unit, pdu)
+        loop = asyncio.get_running_loop()
+        if outcome is None:
+            frames = [(tid, unit, bytes((pdu[0] | 0x80, _GATEWAY_NO_RESPONSE)))]
+            loop.call_soon(self._deliver, frames)
+            return
+        frames = [(tid if f_tid == outcome.tid else f_tid, f_unit, f_pdu) for f_tid, f_unit, f_pdu in outcome.frames]
+        if outcome.lost:
+            loop.call_later(self._log._delay(outcome), self._lose, frames)
+        elif frames:
+            loop.call_later(self._log._delay(outcome), self._deliver, frames)
+        # else: the device never answered; the live response timeout fires.
+
+    def _deliver(self, frames: List[Tuple[int, int, bytes]]) -> None:
+        for tid, unit, pdu in frames:
+            if self._closing:
+                return
+            frame = self._encoder.encode(tid, unit, pdu)
+            buf = self._protocol.get_buffer(len(frame))
+            buf[:len(frame)] = frame
+            self._protocol.buffer_updated(len(frame))
+
+    def _lose(self, frames: List[Tuple[int, int, bytes]]) -> None:
+        self._deliver(frames)
+        if not self._closing:
+            self._closing = True
+            self._protocol.connection_lost(ConnectionResetError("Connection lost in capture"))
+
+    def close(self) -> None:
+        if not self._closing:
+            self._closing = True
+            asyncio.get_running_loop().call_soon(self._protocol.connection_lost, None)
+
+    def abort(self) -> None:
+        self.close()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from typing import Dict, List, Tuple
+
+MBAP_HEADER_LEN = 7  # TID(2) + PID(2) + LEN(2) + UID(1)
+PID_MODBUS = 0
+UID_DEFAULT = 1
+MAX_PDU_LEN = 253  # Modbus application protocol limit
+
+_MBAP = struct.Struct(">HHHB")
+_TID = struct.Struct(">H")
+_ADDR_QTY = struct.Struct(">BHH")  # FC03/04 requests, FC06 request and echo, FC16 echo
+
+
+class ModbusException(Exception):
+    def __init__(self, fc: int, code: int | None):
+        self.fc = fc
+        self.code = code
+        super().__init__(f"Modbus exception (fc=0x{fc:02X}, code={code})")
+
+
+class FrameError(ConnectionError):
+    """The byte stream is not valid Modbus TCP; the connection must be reset."""
+
+
+class FrameEncoder:
+    """Builds request frames from per-request templates.
+
+    Polling sends the same few PDUs over and over, so each (unit, PDU) pair
+    is framed once; later requests only patch the transaction ID in.
+    """
+
+    def __init__(self, max_templates: int = 256):
+        self._templates: Dict[Tuple[int, bytes], bytearray] = {}
+        self._max_templates = max_templates
+
+    def encode(self, tid: int, unit_id: int, pdu: bytes) -> bytes:
+        template = self._templates.get((unit_id, pdu))
+        if template is None:
+            if len(pdu) > MAX_PDU_LEN:
+                raise ValueError(f"PDU too long: {len(pdu)} bytes")
+            template = bytearray(MBAP_HEADER_LEN + len(pdu))
+            _MBAP.pack_into(template, 0, 0, PID_MODBUS, 1 + len(pdu), unit_id)
+            template[MBAP_HEADER_LEN:] = pdu
+            if len(self._templates) >= self._max_templates:
+                self._templates.clear()  # one-off writes must not grow this forever
+            self._templates[(unit_id, pdu)] = template
+        _TID.pack_into(template, 0, tid)
+        return bytes(template)
+
+
+class FrameDecoder:
+    """Incremental MBAP parser over one reusable receive buffer.
+
+    `get_buffer()` / `buffer_updated()` match `asyncio.BufferedProtocol`, so
+    the kernel writes straight into the buffer; `feed()` is for callers
+    holding bytes already. Parsed frames are returned as (tid, unit, pdu).
+    """
+
+    def __init__(self, size: int = 8192):
+        self._buf = bytearray(size)
+        self._view = memoryview(self._buf)
+        self._start = 0  # first unparsed byte
+        self._end = 0  # end of received data
+
+    def get_buffer(self) -> memoryview:
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif len(self._buf) - self._end < MBAP_HEADER_LEN + MAX_PDU_LEN:
+            # Move the partial frame to the front to make room.
+            pending = self._end - self._start
+            self._buf[:pending] = self._buf[self._start:self._end]
+            self._start, self._end = 0, pending
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> List[Tuple[int, int, bytes]]:
+        self._end += nbytes
+        return self._parse()
+
+    def feed(self, data: bytes) -> List[Tuple[int, int, bytes]]:
+        frames: List[Tuple[int, int, bytes]] = []
+        data = memoryview(data)
+        while data:
+            buf = self.get_buffer()
+            n = min(len(buf), len(data))
+            buf[:n] = data[:n]
+            data = data[n:]
+            frames.extend(self.buffer_updated(n))
+        return frames
+
+    def _parse(self) -> List[Tuple[int, int, bytes]]:
+        frames: List[Tuple[int, int, bytes]] = []
+        buf, pos, end = self._buf, self._start, self._end
+        while end - pos >= MBAP_HEADER_LEN:
+            tid, pid, length, unit = _MBAP.unpack_from(buf, pos)
+            if pid != PID_MODBUS:
+                raise FrameError(f"Invalid Modbus PID: {pid}")
+            if not 2 <= length <= MAX_PDU_LEN + 1:
+                raise FrameError(f"Invalid response length: {length}")
+            frame_end = pos + 6 + length
+            if frame_end > end:
+                break
+            frames.append((tid, unit, bytes(buf[pos + MBAP_HEADER_LEN:frame_end])))
+            pos = frame_end
+        self._start = pos
+        return frames
+
+
+def read_request(fc: int, address: int, quantity: int) -> bytes:
+    return _ADDR_QTY.pack(fc, address, quantity)
+
+
+def write_single_request(address: int, value: int) -> bytes:
+    return _ADDR_QTY.pack(0x06, address, value & 0xFFFF)
+
+
+def write_multiple_request(address: int, values: List[int]) -> bytes:
+    qty = len(values)
+    if not 1 <= qty <= 123:
+        raise ValueError(f"Invalid FC16 quantity: {qty}")
+    return struct.pack(f">BHHB{qty}H", 0x10, address, qty, 2 * qty, *(v & 0xFFFF for v in values))
+
+
+def raise_if_exception(resp_pdu: bytes) -> None:
+    if not resp_pdu:
+        raise RuntimeError("Empty response PDU")
+    fc = resp_pdu[0]
+    if fc & 0x80:
+        code = resp_pdu[1] if len(resp_pdu) > 1 else None
+        raise ModbusException(fc=fc, code=code)
+
+
+def read_payload(expected_fc: int, resp_pdu: bytes) -> memoryview:
+    """Validate a FC03/FC04 response and return its register bytes without copying."""
+    raise_if_exception(resp_pdu)
+    if len(resp_pdu) < 2:
+        raise RuntimeError("Short read response")
+    fc = resp_pdu[0]
+    if fc != expected_fc:
+        raise RuntimeError(f"Unexpected function code in response: {fc}")
+    byte_count = resp_pdu[1]
+    data = memoryview(resp_pdu)[2:]
+    if len(data) != byte_count:
+        raise RuntimeError(f"Byte count mismatch: expected {byte_count}, got {len(data)}")
+    if byte_count % 2 != 0:
+        raise RuntimeError(f"Invalid byte_count (not even): {byte_count}")
+    return data
+
+
+def check_write_echo(resp_pdu: bytes, fc: int, address: int, value_or_qty: int) -> None:
+    """Validate the FC06 / FC16 echo of address and value (or quantity)."""
+    raise_if_exception(resp_pdu)
+    if len(resp_pdu) != 5 or resp_pdu[0] != fc:
+        raise RuntimeError(f"Unexpected FC{fc:02d} response: {resp_pdu!r}")
+    _fc, r_addr, r_val = _ADDR_QTY.unpack(resp_pdu)
+    if r_addr != address or r_val != value_or_qty:
+        what = "val" if fc == 0x06 else "qty"
+        raise RuntimeError(f"FC{fc:02d} echo mismatch (addr {r_addr} {what} {r_val})")
+
+
+def words(payload: bytes | memoryview) -> List[int]:
+    regs = array("H")
+    regs.frombytes(payload)
+    if sys.byteorder == "little":
+        regs.byteswap()
+    return regs.tolist()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+
 import voluptuous as vol
 
 from homeassistant import config_entries
@@ -12,49 +14,142 @@ from .const import (
     CONF_SCAN_INTERVAL,
     CONF_ADDRESS_OFFSET,
     CONF_WORD_ORDER,
+    CONF_PIPELINE_DEPTH,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_IDLE_SCAN_INTERVAL,
+    CONF_STALE_AFTER,
+    CONF_UNIT_ID,
     DEFAULT_PORT,
     DEFAULT_SCAN_INTERVAL,
     DEFAULT_ADDRESS_OFFSET,
     DEFAULT_WORD_ORDER,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_FAST_SCAN_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_IDLE_SCAN_INTERVAL,
+    DEFAULT_STALE_AFTER,
+    DEFAULT_UNIT_ID,
+    CHARGING_STATUS_MAP,
 )
+from .probe import ProbeResult, detect_layout
+
+_LOGGER = logging.getLogger(__name__)
+
+# Intervals and ages in seconds; 0 would make the scheduler poll back to back.
+_POSITIVE_INT = vol.All(vol.Coerce(int), vol.Range(min=1))
+
+
+def _interval_errors(user_input: dict) -> dict[str, str]:
+    """stale_after shorter than a polling interval would fail refreshes on one lost read."""
+    longest = max(
+        user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+        user_input.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+        user_input.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL),
+    )
+    if user_input.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER) < longest:
+        return {CONF_STALE_AFTER: "stale_after_too_short"}
+    return {}
 
 
 class AnkerSolixEVConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    def __init__(self):
+        self._user_input: dict = {}
+        self._detected: ProbeResult | None = None
+
     async def async_step_user(self, user_input=None):
+        errors: dict[str, str] = {}
         if user_input is not None:
+            errors = _interval_errors(user_input)
+        if user_input is not None and not errors:
             host = user_input[CONF_HOST]
             port = user_input.get(CONF_PORT, DEFAULT_PORT)
+            unit_id = user_input.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
 
-            await self.async_set_unique_id(f"{host}:{port}")
+            # Unit 1 keeps the historical host:port unique ID.
+            unique_id = f"{host}:{port}" if unit_id == DEFAULT_UNIT_ID else f"{host}:{port}:{unit_id}"
+            await self.async_set_unique_id(unique_id)
             self._abort_if_unique_id_configured()
 
-            data = {CONF_HOST: host, CONF_PORT: port}
+            self._user_input = user_input
+            try:
+                self._detected = await detect_layout(host, port, unit_id)
+            except Exception as err:  # detection is a convenience, never a blocker
+                _LOGGER.debug("Register layout detection failed: %s: %s", type(err).__name__, err)
+                self._detected = None
+            return await self.async_step_layout()
+
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_HOST): str,
+                vol.Optional(CONF_PORT, default=DEFAULT_PORT): vol.Coerce(int),
+                vol.Optional(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+                vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): _POSITIVE_INT,
+                vol.Optional(CONF_FAST_SCAN_INTERVAL, default=DEFAULT_FAST_SCAN_INTERVAL): _POSITIVE_INT,
+                vol.Optional(CONF_SLOW_SCAN_INTERVAL, default=DEFAULT_SLOW_SCAN_INTERVAL): _POSITIVE_INT,
+                vol.Optional(CONF_IDLE_SCAN_INTERVAL, default=DEFAULT_IDLE_SCAN_INTERVAL): _POSITIVE_INT,
+                vol.Optional(CONF_STALE_AFTER, default=DEFAULT_STALE_AFTER): _POSITIVE_INT,
+                vol.Optional(CONF_PIPELINE_DEPTH, default=DEFAULT_PIPELINE_DEPTH): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=16)
+                ),
+            }
+        )
+        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+
+    async def async_step_layout(self, user_input=None):
+        """Confirm the address offset and word order, pre-filled from detection."""
+        if user_input is not None:
+            host = self._user_input[CONF_HOST]
+            port = self._user_input.get(CONF_PORT, DEFAULT_PORT)
+            unit_id = self._user_input.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+
+            data = {CONF_HOST: host, CONF_PORT: port, CONF_UNIT_ID: unit_id}
             options = {
                 CONF_HOST: host,
                 CONF_PORT: port,
-                CONF_SCAN_INTERVAL: user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                CONF_UNIT_ID: unit_id,
+                CONF_SCAN_INTERVAL: self._user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                CONF_FAST_SCAN_INTERVAL: self._user_input.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL),
+                CONF_SLOW_SCAN_INTERVAL: self._user_input.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL),
+                CONF_IDLE_SCAN_INTERVAL: self._user_input.get(CONF_IDLE_SCAN_INTERVAL, DEFAULT_IDLE_SCAN_INTERVAL),
+                CONF_STALE_AFTER: self._user_input.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER),
                 CONF_ADDRESS_OFFSET: user_input.get(CONF_ADDRESS_OFFSET, DEFAULT_ADDRESS_OFFSET),
                 CONF_WORD_ORDER: user_input.get(CONF_WORD_ORDER, DEFAULT_WORD_ORDER),
+                CONF_PIPELINE_DEPTH: self._user_input.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH),
             }
 
+            title = f"Anker SOLIX EV ({host})" if unit_id == DEFAULT_UNIT_ID else f"Anker SOLIX EV ({host} #{unit_id})"
             return self.async_create_entry(
-                title=f"Anker SOLIX EV ({host})",
+                title=title,
                 data=data,
                 options=options,
             )
 
+        detected = self._detected
+        if detected is not None:
+            offset, word_order = detected.address_offset, detected.word_order
+            status = detected.data.get("charging_status")
+            result = (
+                f"offset {offset}, word order {word_order} "
+                f"(charging status {CHARGING_STATUS_MAP.get(status, status)}, "
+                f"L1-N {detected.data.get('v_l1n', 0) / 10:.1f} V)"
+            )
+        else:
+            offset, word_order, result = DEFAULT_ADDRESS_OFFSET, DEFAULT_WORD_ORDER, "-"
+
         schema = vol.Schema(
             {
-                vol.Required(CONF_HOST): str,
-                vol.Optional(CONF_PORT, default=DEFAULT_PORT): vol.Coerce(int),
-                vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): vol.Coerce(int),
-                vol.Optional(CONF_ADDRESS_OFFSET, default=DEFAULT_ADDRESS_OFFSET): vol.Coerce(int),
-                vol.Optional(CONF_WORD_ORDER, default=DEFAULT_WORD_ORDER): vol.In(["hi_lo", "lo_hi"]),
+                vol.Required(CONF_ADDRESS_OFFSET, default=offset): vol.Coerce(int),
+                vol.Required(CONF_WORD_ORDER, default=word_order): vol.In(["hi_lo", "lo_hi"]),
             }
         )
-        return self.async_show_form(step_id="user", data_schema=schema)
+        return self.async_show_form(
+            step_id="layout",
+            data_schema=schema,
+            description_placeholders={"result": result},
+        )
 
     @staticmethod
     @callback
@@ -67,8 +162,11 @@ class AnkerSolixEVOptionsFlow(config_entries.OptionsFlow):
         self._config_entry = config_entry
 
     async def async_step_init(self, user_input=None):
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            errors = _interval_errors(user_input)
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
 
         opts = dict(self.config_entry.options)
         data = dict(self.config_entry.data)
@@ -80,10 +178,30 @@ class AnkerSolixEVOptionsFlow(config_entries.OptionsFlow):
             {
                 vol.Required(CONF_HOST, default=cur_host): str,
                 vol.Required(CONF_PORT, default=cur_port): vol.Coerce(int),
+                vol.Required(
+                    CONF_UNIT_ID,
+                    default=opts.get(CONF_UNIT_ID, data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
                 vol.Required(
                     CONF_SCAN_INTERVAL,
                     default=opts.get(CONF_SCAN_INTERVAL, data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)),
-                ): vol.Coerce(int),
+                ): _POSITIVE_INT,
+                vol.Required(
+                    CONF_FAST_SCAN_INTERVAL,
+                    default=opts.get(CONF_FAST_SCAN_INTERVAL, data.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL)),
+                ): _POSITIVE_INT,
+                vol.Required(
+                    CONF_SLOW_SCAN_INTERVAL,
+                    default=opts.get(CONF_SLOW_SCAN_INTERVAL, data.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL)),
+                ): _POSITIVE_INT,
+                vol.Required(
+                    CONF_IDLE_SCAN_INTERVAL,
+                    default=opts.get(CONF_IDLE_SCAN_INTERVAL, data.get(CONF_IDLE_SCAN_INTERVAL, DEFAULT_IDLE_SCAN_INTERVAL)),
+                ): _POSITIVE_INT,
+                vol.Required(
+                    CONF_STALE_AFTER,
+                    default=opts.get(CONF_STALE_AFTER, data.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER)),
+                ): _POSITIVE_INT,
                 vol.Required(
                     CONF_ADDRESS_OFFSET,
                     default=opts.get(CONF_ADDRESS_OFFSET, data.get(CONF_ADDRESS_OFFSET, DEFAULT_ADDRESS_OFFSET)),
@@ -92,6 +210,10 @@ class AnkerSolixEVOptionsFlow(config_entries.OptionsFlow):
                     CONF_WORD_ORDER,
                     default=opts.get(CONF_WORD_ORDER, data.get(CONF_WORD_ORDER, DEFAULT_WORD_ORDER)),
                 ): vol.In(["hi_lo", "lo_hi"]),
+                vol.Required(
+                    CONF_PIPELINE_DEPTH,
+                    default=opts.get(CONF_PIPELINE_DEPTH, data.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH)),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
             }
         )
-        return self.async_show_form(step_id="init", data_schema=schema)
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
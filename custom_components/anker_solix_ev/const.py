@@ -6,11 +6,55 @@ CONF_PORT = "port"
 CONF_SCAN_INTERVAL = "scan_interval"
 CONF_ADDRESS_OFFSET = "address_offset"
 CONF_WORD_ORDER = "word_order"
+CONF_PIPELINE_DEPTH = "pipeline_depth"
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_SLOW_SCAN_INTERVAL = "slow_scan_interval"
+CONF_IDLE_SCAN_INTERVAL = "idle_scan_interval"
+CONF_STALE_AFTER = "stale_after"
+CONF_UNIT_ID = "unit_id"
 
 DEFAULT_PORT = 502
-DEFAULT_SCAN_INTERVAL = 5  # seconds
+DEFAULT_SCAN_INTERVAL = 5  # seconds, "normal" polling tier
+DEFAULT_FAST_SCAN_INTERVAL = 5  # seconds, "fast" tier (power, status)
+DEFAULT_SLOW_SCAN_INTERVAL = 60  # seconds, "slow" tier (temperatures, settings)
+DEFAULT_IDLE_SCAN_INTERVAL = 30  # seconds, fast/normal tiers while idle, completed or disabled
+DEFAULT_STALE_AFTER = 120  # seconds a key may go without a good read before the refresh fails
 DEFAULT_ADDRESS_OFFSET = 0
 DEFAULT_WORD_ORDER = "hi_lo"  # or "lo_hi"
+DEFAULT_PIPELINE_DEPTH = 1  # transactions in flight per socket (1 = lock-step)
+DEFAULT_UNIT_ID = 1  # Modbus unit ID; set per charger behind a Modbus TCP gateway
+
+# Persisted last-known snapshot (restored at startup)
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60  # seconds, batches snapshot writes
+
+# Time budget of one coordinator refresh, shared by all its Modbus exchanges
+REFRESH_BUDGET_MIN_S = 5.0
+REFRESH_BUDGET_MAX_S = 30.0
+READBACK_BUDGET_S = 5.0
+
+# Fleet scheduler (shared by all entries)
+DATA_SCHEDULER = "scheduler"
+FLEET_MAX_CONCURRENT_EXCHANGES = 4  # Modbus exchanges in flight across all chargers
+FLEET_POLL_JITTER = 0.05            # +/- fraction of the interval added per cycle
+
+# Config-flow layout detection: candidates in order of preference
+PROBE_OFFSETS = (0, -1, 1)
+PROBE_WORD_ORDERS = ("hi_lo", "lo_hi")
+PROBE_BUDGET_S = 8.0
+
+# Connection pool: entries on the same host:port share one TCP connection
+DATA_POOL = "pool"
+
+# Register dump service
+SERVICE_DUMP_REGISTERS = "dump_registers"
+DUMP_DEFAULT_RANGES = "20000-20120, 21000-21010"
+DUMP_FORMATS = ("jsonl", "csv")
+
+# Traffic capture service (binary frame log, replayed with tools/replay.py)
+SERVICE_CAPTURE_TRAFFIC = "capture_traffic"
+CAPTURE_DEFAULT_DURATION_S = 300
+CAPTURE_MAX_DURATION_S = 3600
 
 # Status / totals
 REG_CHARGING_STATUS = 20097          # uint16 (0..8)
@@ -35,7 +79,7 @@ REG_L3_CURRENT = 20061
 REG_L1_ACTIVE_POWER = 20062          # uint32, W
 REG_L2_ACTIVE_POWER = 20064
 REG_L3_ACTIVE_POWER = 20066
-REG_L1_REACTIVE_POWER = 20070        # uint32, var
+REG_L1_REACTIVE_POWER = 20070        # int32, var
 REG_L2_REACTIVE_POWER = 20072
 REG_L3_REACTIVE_POWER = 20074
 REG_L1_APPARENT_POWER = 20076        # uint32, VA
@@ -75,6 +119,15 @@ CHARGING_STATUS_MAP = {
     8: "error",
 }
 
+# State-aware polling: statuses polled at the idle interval, and the fast-poll
+# burst that follows any charging status / CP signal transition.
+IDLE_CHARGING_STATUSES = (0, 5, 7)  # idle, charging_completed, disabled
+BURST_SCAN_INTERVAL = 1  # seconds
+BURST_DURATION = 30  # seconds after a transition
+
+# Poll intervals at or above this close the idle socket between refreshes.
+IDLE_CLOSE_MIN_INTERVAL = 30
+
 OPERATING_MODE_MAP = {1: "single_phase", 3: "three_phase"}
 CHARGING_MODE_MAP = {0: "solar+grid", 1: "only_solar"}
 
@@ -93,3 +146,145 @@ CP_ACQ_VOLTAGE_MAP = {
 
 PHASE_MAP = {0: "auto", 1: "single_phase", 2: "three_phase"}
 PHASE_REVERSE_MAP = {v: k for k, v in PHASE_MAP.items()}
+
+# Register map used by the coordinator read planner: key -> (register, type).
+# Types: "u16"/"s16" (1 word), "u32"/"s32" (2 words, order from CONF_WORD_ORDER).
+REGISTER_MAP = {
+    "charging_status": (REG_CHARGING_STATUS, "u16"),
+    "power_w": (REG_TOTAL_ACTIVE_POWER, "u32"),
+    "duration_s": (REG_SESSION_DURATION, "u32"),
+    "energy_wh": (REG_SESSION_ENERGY_WH, "u32"),
+    "phase_setting": (REG_PHASE_SETTING, "u16"),
+    "max_current": (REG_MAX_CURRENT, "u16"),
+
+    "v_l1n": (REG_L1N_VOLTAGE, "u16"),
+    "v_l2n": (REG_L2N_VOLTAGE, "u16"),
+    "v_l3n": (REG_L3N_VOLTAGE, "u16"),
+    "v_l12": (REG_L12_VOLTAGE, "u16"),
+    "v_l23": (REG_L23_VOLTAGE, "u16"),
+    "v_l31": (REG_L31_VOLTAGE, "u16"),
+
+    "i_l1": (REG_L1_CURRENT, "u16"),
+    "i_l2": (REG_L2_CURRENT, "u16"),
+    "i_l3": (REG_L3_CURRENT, "u16"),
+
+    "p_l1": (REG_L1_ACTIVE_POWER, "u32"),
+    "p_l2": (REG_L2_ACTIVE_POWER, "u32"),
+    "p_l3": (REG_L3_ACTIVE_POWER, "u32"),
+    "q_l1": (REG_L1_REACTIVE_POWER, "s32"),
+    "q_l2": (REG_L2_REACTIVE_POWER, "s32"),
+    "q_l3": (REG_L3_REACTIVE_POWER, "s32"),
+    "s_l1": (REG_L1_APPARENT_POWER, "u32"),
+    "s_l2": (REG_L2_APPARENT_POWER, "u32"),
+    "s_l3": (REG_L3_APPARENT_POWER, "u32"),
+
+    "operating_mode": (REG_OPERATING_MODE, "u16"),
+    "pwm_enabled": (REG_PWM_ENABLED, "u16"),
+    "charging_mode": (REG_CHARGING_MODE, "u16"),
+    "cp_signal_status": (REG_CP_SIGNAL_STATUS, "u16"),
+    "load_balancing_enabled": (REG_LOAD_BALANCING_ENABLED, "u16"),
+    "solar_balancing_enabled": (REG_SOLAR_BALANCING_ENABLED, "u16"),
+    "cp_acq_voltage": (REG_CP_ACQ_VOLTAGE, "u16"),
+    "led_brightness": (REG_LED_BRIGHTNESS, "u16"),
+
+    "relay1_temp": (REG_RELAY1_TEMP, "u16"),
+    "relay2_temp": (REG_RELAY2_TEMP, "u16"),
+}
+
+# Keys backed by writable settings registers (read values seed write de-duplication).
+WRITABLE_KEYS = ("phase_setting", "max_current")
+
+# Keys read every refresh whether or not an entity shows them: they drive
+# the poll mode, single-phase detection and write de-duplication.
+ALWAYS_POLLED_KEYS = ("charging_status", "cp_signal_status", "operating_mode") + WRITABLE_KEYS
+
+# Entities created disabled; enabling one adds its register to the read plan.
+DISABLED_BY_DEFAULT_KEYS = frozenset({
+    "v_l12", "v_l23", "v_l31",
+    "q_l1", "q_l2", "q_l3",
+    "s_l1", "s_l2", "s_l3",
+    "cp_acq_voltage", "led_brightness",
+    "pf_l1", "pf_l2", "pf_l3", "q_total",
+})
+# Also created disabled when the charger reports a single-phase installation.
+PHASE_2_3_KEYS = frozenset({"v_l2n", "v_l3n", "i_l2", "i_l3", "p_l2", "p_l3", "current_imbalance"})
+
+# Raw value divisors, applied once per snapshot (coordinator.values).
+REGISTER_GAINS = {
+    "v_l1n": 10,
+    "v_l2n": 10,
+    "v_l3n": 10,
+    "v_l12": 10,
+    "v_l23": 10,
+    "v_l31": 10,
+    "i_l1": 100,
+    "i_l2": 100,
+    "i_l3": 100,
+}
+
+# Metrics derived from each snapshot (derived.py) and the keys they are
+# computed from; enabling a derived entity adds its sources to the read plan.
+DERIVED_SOURCES = {
+    "i_total": ("i_l1", "i_l2", "i_l3"),
+    "current_imbalance": ("i_l1", "i_l2", "i_l3", "operating_mode"),
+    "pf_l1": ("p_l1", "s_l1"),
+    "pf_l2": ("p_l2", "s_l2"),
+    "pf_l3": ("p_l3", "s_l3"),
+    "q_total": ("q_l1", "q_l2", "q_l3"),
+}
+
+# Keys read back after a write to a control register, instead of a full refresh.
+WRITE_READBACK_KEYS = {
+    REG_COMMAND: ("charging_status", "power_w"),
+    REG_MAX_CURRENT: ("max_current",),
+    REG_PHASE_SETTING: ("phase_setting", "operating_mode"),
+}
+
+REGISTER_WIDTHS = {"u16": 1, "s16": 1, "u32": 2, "s32": 2}
+
+# Polling tier per key; keys not listed use TIER_NORMAL.
+TIER_FAST = "fast"
+TIER_NORMAL = "normal"
+TIER_SLOW = "slow"
+
+REGISTER_TIERS = {
+    "charging_status": TIER_FAST,
+    "power_w": TIER_FAST,
+    "p_l1": TIER_FAST,
+    "p_l2": TIER_FAST,
+    "p_l3": TIER_FAST,
+    "i_l1": TIER_FAST,
+    "i_l2": TIER_FAST,
+    "i_l3": TIER_FAST,
+    "cp_signal_status": TIER_FAST,
+
+    "pwm_enabled": TIER_SLOW,
+    "load_balancing_enabled": TIER_SLOW,
+    "solar_balancing_enabled": TIER_SLOW,
+    "cp_acq_voltage": TIER_SLOW,
+    "led_brightness": TIER_SLOW,
+    "relay1_temp": TIER_SLOW,
+    "relay2_temp": TIER_SLOW,
+}
+
+# Register cache: how long a read answers later reads of the same registers,
+# per polling tier. Shorter than any sensible poll interval, so polls stay
+# fresh while bursts of entity actions and automations share reads.
+CACHE_TTLS = {TIER_FAST: 0.5, TIER_NORMAL: 1.0, TIER_SLOW: 10.0}
+
+# Read planner limits
+MAX_READ_QUANTITY = 125  # FC03/FC04 protocol maximum
+MAX_READ_GAP = 8         # unused registers allowed between two keys of one block
+
+# Change-only listener fan-out: minimum raw change before entities of a key
+# are written again. Keys not listed notify on any change.
+REGISTER_DEADBANDS = {
+    "v_l1n": 5,  # 0.5 V
+    "v_l2n": 5,
+    "v_l3n": 5,
+    "v_l12": 5,
+    "v_l23": 5,
+    "v_l31": 5,
+    "relay1_temp": 1,  # °C
+    "relay2_temp": 1,
+}
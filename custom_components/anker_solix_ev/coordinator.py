@@ -1,145 +1,511 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
-from datetime import timedelta
+import time
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import (
     DOMAIN,
-    CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL, CONF_ADDRESS_OFFSET, CONF_WORD_ORDER,
-    DEFAULT_PORT, DEFAULT_SCAN_INTERVAL, DEFAULT_ADDRESS_OFFSET, DEFAULT_WORD_ORDER,
-    REG_CHARGING_STATUS, REG_TOTAL_ACTIVE_POWER, REG_SESSION_DURATION, REG_SESSION_ENERGY_WH,
-    REG_PHASE_SETTING, REG_MAX_CURRENT,
-    REG_L1N_VOLTAGE, REG_L2N_VOLTAGE, REG_L3N_VOLTAGE, REG_L12_VOLTAGE, REG_L23_VOLTAGE, REG_L31_VOLTAGE,
-    REG_L1_CURRENT, REG_L2_CURRENT, REG_L3_CURRENT,
-    REG_L1_ACTIVE_POWER, REG_L2_ACTIVE_POWER, REG_L3_ACTIVE_POWER,
-    REG_L1_REACTIVE_POWER, REG_L2_REACTIVE_POWER, REG_L3_REACTIVE_POWER,
-    REG_L1_APPARENT_POWER, REG_L2_APPARENT_POWER, REG_L3_APPARENT_POWER,
-    REG_OPERATING_MODE, REG_PWM_ENABLED, REG_CHARGING_MODE,
-    REG_CP_SIGNAL_STATUS, REG_LOAD_BALANCING_ENABLED, REG_SOLAR_BALANCING_ENABLED,
-    REG_CP_ACQ_VOLTAGE, REG_LED_BRIGHTNESS,
-    REG_RELAY1_TEMP, REG_RELAY2_TEMP,
+    CONF_HOST, CONF_PORT, CONF_SCAN_INTERVAL, CONF_ADDRESS_OFFSET, CONF_WORD_ORDER, CONF_PIPELINE_DEPTH,
+    CONF_FAST_SCAN_INTERVAL, CONF_SLOW_SCAN_INTERVAL, CONF_IDLE_SCAN_INTERVAL, CONF_STALE_AFTER, CONF_UNIT_ID,
+    DEFAULT_PORT, DEFAULT_SCAN_INTERVAL, DEFAULT_ADDRESS_OFFSET, DEFAULT_WORD_ORDER, DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_FAST_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL, DEFAULT_IDLE_SCAN_INTERVAL, DEFAULT_STALE_AFTER,
+    DEFAULT_UNIT_ID,
+    IDLE_CHARGING_STATUSES, BURST_SCAN_INTERVAL, BURST_DURATION, IDLE_CLOSE_MIN_INTERVAL,
+    REFRESH_BUDGET_MIN_S, REFRESH_BUDGET_MAX_S, READBACK_BUDGET_S,
+    STORAGE_VERSION, STORAGE_SAVE_DELAY,
+    REGISTER_MAP, REGISTER_TIERS, REGISTER_WIDTHS, TIER_FAST, TIER_NORMAL, TIER_SLOW, CACHE_TTLS,
+    REGISTER_DEADBANDS, WRITABLE_KEYS, WRITE_READBACK_KEYS, REG_CHARGING_STATUS,
+    DISABLED_BY_DEFAULT_KEYS, PHASE_2_3_KEYS, DERIVED_SOURCES,
 )
-from .modbus_client import AnkerModbusClient, ModbusSettings
+from .decoder import BlockDecoder
+from .derived import derive_values
+from .modbus_client import (
+    PRIORITY_POLL, PRIORITY_USER,
+    AnkerModbusClient, ConnectionPool, Deadline, DeadlineExceeded, ModbusException, ModbusSettings, PriorityGate,
+)
+from .planner import ReadBlock, plan_reads, plan_tier_reads, polled_keys
 
 _LOGGER = logging.getLogger(__name__)
 
+_MISSING = object()
+
+# Derived keys to re-notify when a source key goes stale or fresh again.
+_DERIVED_BY_SOURCE = {
+    source: tuple(key for key, sources in DERIVED_SOURCES.items() if source in sources)
+    for source in {source for sources in DERIVED_SOURCES.values() for source in sources}
+}
+
 
 class AnkerSolixCoordinator(DataUpdateCoordinator[dict]):
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        limiter: PriorityGate | None = None,
+        pool: ConnectionPool | None = None,
+    ):
         self.entry = entry
         data = entry.data
         opts = entry.options
 
         host = opts.get(CONF_HOST, data[CONF_HOST])
         port = int(opts.get(CONF_PORT, data.get(CONF_PORT, DEFAULT_PORT)))
+        unit_id = int(opts.get(CONF_UNIT_ID, data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)))
         scan = int(opts.get(CONF_SCAN_INTERVAL, data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)))
         offset = int(opts.get(CONF_ADDRESS_OFFSET, data.get(CONF_ADDRESS_OFFSET, DEFAULT_ADDRESS_OFFSET)))
         word_order = str(opts.get(CONF_WORD_ORDER, data.get(CONF_WORD_ORDER, DEFAULT_WORD_ORDER)))
+        pipeline_depth = int(opts.get(CONF_PIPELINE_DEPTH, data.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH)))
+        fast = int(opts.get(CONF_FAST_SCAN_INTERVAL, data.get(CONF_FAST_SCAN_INTERVAL, DEFAULT_FAST_SCAN_INTERVAL)))
+        slow = int(opts.get(CONF_SLOW_SCAN_INTERVAL, data.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL)))
+        idle = int(opts.get(CONF_IDLE_SCAN_INTERVAL, data.get(CONF_IDLE_SCAN_INTERVAL, DEFAULT_IDLE_SCAN_INTERVAL)))
+        stale_after = int(opts.get(CONF_STALE_AFTER, data.get(CONF_STALE_AFTER, DEFAULT_STALE_AFTER)))
 
         self.client = AnkerModbusClient(
             ModbusSettings(
                 host=host,
                 port=port,
+                unit_id=unit_id,
                 address_offset=offset,
                 word_order=word_order,
                 connect_timeout=2.0,
                 response_timeout=2.0,
+                max_response_timeout=4.0,
                 retries=1,
                 retry_delay_s=0.2,
-            )
+                pipeline_depth=pipeline_depth,
+                probe_register=REG_CHARGING_STATUS,
+                cache_ttls={
+                    register + i: CACHE_TTLS[REGISTER_TIERS.get(key, TIER_NORMAL)]
+                    for key, (register, kind) in REGISTER_MAP.items()
+                    for i in range(REGISTER_WIDTHS[kind])
+                },
+                # Unmapped registers inside planned blocks must not keep them from hitting.
+                cache_default_ttl=CACHE_TTLS[TIER_FAST],
+            ),
+            limiter=limiter,
+            pool=pool,
         )
 
+        # Each tier has its own interval; a refresh reads only the tiers that
+        # are due, planned together so their blocks merge on the wire, and
+        # merges them into the previous snapshot. Plans only cover keys with
+        # an enabled entity (see _enabled_keys).
+        self.tier_intervals: dict[str, float] = {
+            TIER_FAST: float(fast),
+            TIER_NORMAL: float(scan),
+            TIER_SLOW: float(slow),
+        }
+        self._word_order = word_order
+        self._tier_last: dict[str, float] = {}
+        self._read_backs: dict[int, tuple[int, asyncio.Task]] = {}  # register -> (write generation, read)
+        self.polled_keys: frozenset[str] = frozenset()
+        self._plans: dict[frozenset[str], list[ReadBlock]] = {}  # by set of due tiers
+        self._decoders: dict[ReadBlock, BlockDecoder] = {}
+        # Our registered entity IDs; a removed entity is gone from the registry.
+        self._entity_ids: frozenset[str] = frozenset()
+
+        # Polling is driven by the domain FleetScheduler, not by a per-entry timer.
+        # The mode follows the charging state: "idle" stretches the fast and
+        # normal tiers, "burst" polls the fast tier quickly after a transition.
+        self.idle_interval = float(idle)
+        self.poll_mode = "active"
+        self._burst_until = 0.0
+        self._last_state: tuple | None = None
+        self.poll_interval: float = min(self.tier_intervals.values())
+        self.poll_lag: float | None = None
+
+        # Keyed listeners are only called when one of their keys changed
+        # beyond its deadband since they were last notified.
+        self._key_listeners: dict[CALLBACK_TYPE, frozenset[str]] = {}
+        self._notified: dict = {}
+        self._notified_success: bool | None = None
+
+        # Scaled and derived values of the current snapshot, computed once
+        # per update (derived.py); entities read these instead of `data`.
+        self.values: dict = {}
+
+        # Last good read per key (loop time). A refresh that loses some blocks
+        # keeps the previous values, marked stale, until `stale_after` expires.
+        self.stale_after = float(stale_after)
+        self.key_updated: dict[str, float] = {}
+        self.stale_keys: set[str] = set()
+        self._stale_dirty: set[str] = set()
+
+        # Snapshot persisted across restarts; restored keys stay stale until read live.
+        self._store: Store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        self.restored_keys: set[str] = set()
+
         super().__init__(
             hass,
             logger=_LOGGER,
             name=f"{DOMAIN}_{entry.entry_id}",
-            update_interval=timedelta(seconds=scan),
+            update_interval=None,
+        )
+        self._set_polled_keys(self._enabled_keys())
+
+    def _enabled_keys(self) -> frozenset[str]:
+        """Register keys shown by (or derived for) an enabled entity, plus the always-polled ones."""
+        entries = er.async_entries_for_config_entry(er.async_get(self.hass), self.entry.entry_id)
+        self._entity_ids = frozenset(e.entity_id for e in entries)
+        if not entries:
+            # First setup: entities are not registered yet, read everything.
+            return frozenset(REGISTER_MAP)
+        prefix = f"{self.entry.entry_id}_"
+        return polled_keys(
+            e.unique_id.removeprefix(prefix)
+            for e in entries
+            if e.disabled_by is None and e.unique_id.startswith(prefix)
         )
 
+    def _set_polled_keys(self, keys: frozenset[str]) -> None:
+        if keys == self.polled_keys:
+            return
+        added = keys - self.polled_keys
+        self.polled_keys = keys
+        self._plans = {}
+        self._decoders = {}
+        if any(k not in (self.data or {}) for k in added):
+            # Newly enabled keys have no value yet: read every tier next tick.
+            self._tier_last.clear()
+        _LOGGER.debug(
+            "%s read plan: %s key(s) in %s block(s)",
+            self.name, len(keys), len(self._plan(self.tier_intervals)),
+        )
+
+    def _plan(self, tiers) -> list[ReadBlock]:
+        """Blocks covering the polled keys of `tiers`, planned as one set."""
+        due = frozenset(tiers)
+        plan = self._plans.get(due)
+        if plan is None:
+            plan = self._plans[due] = plan_tier_reads(self.polled_keys, due)
+        return plan
+
+    @callback
+    def async_track_entity_registry(self) -> CALLBACK_TYPE:
+        """Rebuild the read plan whenever one of our entities is enabled, disabled or removed."""
+
+        @callback
+        def _registry_updated(event: Event) -> None:
+            if event.data["action"] == "update" and "disabled_by" not in event.data.get("changes", {}):
+                return
+            entity = er.async_get(self.hass).async_get(event.data["entity_id"])
+            if entity is None:
+                ours = event.data["entity_id"] in self._entity_ids
+            else:
+                ours = entity.config_entry_id == self.entry.entry_id
+            if ours:
+                self._set_polled_keys(self._enabled_keys())
+
+        return self.hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, _registry_updated)
+
+    def enabled_by_default(self, key: str) -> bool:
+        """Whether the entity for `key` is created enabled."""
+        if key in DISABLED_BY_DEFAULT_KEYS:
+            return False
+        single_phase = (self.data or {}).get("operating_mode") == 1
+        return not (single_phase and key in PHASE_2_3_KEYS)
+
+    @callback
+    def async_add_key_listener(self, keys, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for changes of `keys` only; return a function that removes the listener."""
+        self._key_listeners[update_callback] = frozenset(keys)
+
+        @callback
+        def remove_listener() -> None:
+            self._key_listeners.pop(update_callback, None)
+
+        return remove_listener
+
+    @staticmethod
+    def _same_value(key: str, old, new) -> bool:
+        if old == new:
+            return True
+        if old is None or new is None:
+            return False
+        band = REGISTER_DEADBANDS.get(key)
+        return band is not None and abs(new - old) < band
+
+    def _changed_keys(self) -> set[str]:
+        changed: set[str] = set(self._stale_dirty)
+        for key in self._stale_dirty:
+            changed.update(_DERIVED_BY_SOURCE.get(key, ()))
+        self._stale_dirty.clear()
+        derived = ((key, self.values.get(key)) for key in DERIVED_SOURCES)
+        for key, value in itertools.chain((self.data or {}).items(), derived):
+            old = self._notified.get(key, _MISSING)
+            if old is _MISSING or not self._same_value(key, old, value):
+                changed.add(key)
+                self._notified[key] = value
+        return changed
+
+    @callback
+    def async_update_listeners(self) -> None:
+        self.values = derive_values(self.data or {})
+        super().async_update_listeners()
+
+        if self._notified_success != self.last_update_success:
+            # Availability flipped: every entity has to be written.
+            self._notified_success = self.last_update_success
+            self._changed_keys()
+            targets = list(self._key_listeners)
+        else:
+            changed = self._changed_keys()
+            if not changed:
+                return
+            targets = [cb for cb, keys in self._key_listeners.items() if not keys.isdisjoint(changed)]
+
+        for update_callback in targets:
+            update_callback()
+
+    def key_age(self, key: str) -> float | None:
+        """Seconds since `key` was last read successfully."""
+        updated = self.key_updated.get(key)
+        return None if updated is None else self.hass.loop.time() - updated
+
+    def key_attributes(self, key: str) -> dict | None:
+        """State attributes flagging a value (or a source of a derived one) that is not fresh from the device."""
+        stale = [k for k in DERIVED_SOURCES.get(key, (key,)) if k in self.stale_keys]
+        if not stale:
+            return None
+        ages = [age for age in map(self.key_age, stale) if age is not None]
+        attrs = {"stale": True, "age_s": round(max(ages), 1) if ages else None}
+        if not self.restored_keys.isdisjoint(stale):
+            attrs["restored"] = True
+        return attrs
+
+    async def async_restore(self) -> bool:
+        """Load the last persisted snapshot into `data`; return whether one existed."""
+        stored = await self._store.async_load()
+        if not stored or not stored.get("data"):
+            return False
+        now = self.hass.loop.time()
+        wall_now = time.time()
+        data = {k: v for k, v in stored["data"].items() if k in REGISTER_MAP}
+        for key in data:
+            saved_at = stored.get("updated", {}).get(key, stored.get("saved_at", wall_now))
+            self.key_updated[key] = now - max(0.0, wall_now - float(saved_at))
+        self.restored_keys = set(data)
+        self.stale_keys = set(data)
+        self.data = data
+        self.values = derive_values(data)
+        _LOGGER.debug("%s restored %s key(s) from storage", self.name, len(data))
+        return True
+
+    def _snapshot(self) -> dict:
+        now = self.hass.loop.time()
+        wall_now = time.time()
+        return {
+            "saved_at": wall_now,
+            "data": dict(self.data or {}),
+            "updated": {k: wall_now - (now - t) for k, t in self.key_updated.items()},
+        }
+
+    def _merge(self, data: dict, part: dict, now: float) -> None:
+        data.update(part)
+        for key in part:
+            self.key_updated[key] = now
+            self.restored_keys.discard(key)
+            if key in self.stale_keys:
+                self.stale_keys.discard(key)
+                self._stale_dirty.add(key)
+        self.client.note_values({REGISTER_MAP[k][0]: part[k] for k in WRITABLE_KEYS if k in part})
+
+    def _mark_stale(self, keys) -> None:
+        for key in keys:
+            if key not in self.stale_keys:
+                self.stale_keys.add(key)
+                self._stale_dirty.add(key)
+
+    def _refresh_budget(self) -> float:
+        # Finish before the next tick is due, within sane bounds.
+        return max(REFRESH_BUDGET_MIN_S, min(REFRESH_BUDGET_MAX_S, 0.8 * self.poll_interval))
+
     async def _async_update_data(self) -> dict:
+        deadline = Deadline(self._refresh_budget())
         try:
-            return await asyncio.wait_for(self._read_all_data(), timeout=30.0)
+            # The outer wait_for is only a backstop: exchanges size their
+            # timeouts and retries to what is left of the deadline.
+            return await asyncio.wait_for(self._read_all_data(deadline), timeout=deadline.budget_s + 5.0)
+        except UpdateFailed:
+            raise
+        except DeadlineExceeded as err:
+            raise UpdateFailed(f"Modbus refresh budget of {deadline.budget_s:.1f}s exhausted") from err
         except TimeoutError as err:
-            raise UpdateFailed("Modbus refresh timeout after 30s") from err
+            raise UpdateFailed(f"Modbus refresh timeout after {deadline.budget_s + 5.0:.0f}s") from err
         except Exception as err:
             raise UpdateFailed(str(err)) from err
 
-    async def _read_all_data(self) -> dict:
-        status = await self.client.read_u16(REG_CHARGING_STATUS)
-        power_w = await self.client.read_u32(REG_TOTAL_ACTIVE_POWER)
-        duration_s = await self.client.read_u32(REG_SESSION_DURATION)
-        energy_wh = await self.client.read_u32(REG_SESSION_ENERGY_WH)
+    def _decoder(self, block: ReadBlock) -> BlockDecoder:
+        decoder = self._decoders.get(block)
+        if decoder is None:
+            decoder = self._decoders[block] = BlockDecoder(block, REGISTER_MAP, self._word_order)
+        return decoder
 
-        phase = await self.client.read_u16(REG_PHASE_SETTING)
-        max_current = await self.client.read_u16(REG_MAX_CURRENT)
+    async def _read_planned_block(
+        self,
+        block: ReadBlock,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+        max_age: float | None = None,
+    ) -> dict:
+        try:
+            payload = await self.client.read_block_raw(block.start, block.quantity, deadline, priority, max_age)
+        except ModbusException as err:
+            # A merged block may cross an unmapped address: fall back to
+            # per-register reads so a single hole does not hide the others.
+            if err.code != 2 or len(block.keys) == 1:
+                raise
+            _LOGGER.debug("Block %s+%s rejected, reading registers one by one", block.start, block.quantity)
+            out: dict = {}
+            for key in block.keys:
+                out.update(await self._read_planned_block(plan_reads([key])[0], deadline, priority, max_age))
+            return out
 
-        v_l1n = await self.client.read_u16(REG_L1N_VOLTAGE)
-        v_l2n = await self.client.read_u16(REG_L2N_VOLTAGE)
-        v_l3n = await self.client.read_u16(REG_L3N_VOLTAGE)
-        v_l12 = await self.client.read_u16(REG_L12_VOLTAGE)
-        v_l23 = await self.client.read_u16(REG_L23_VOLTAGE)
-        v_l31 = await self.client.read_u16(REG_L31_VOLTAGE)
+        return self._decoder(block).decode(payload)
 
-        i_l1 = await self.client.read_u16(REG_L1_CURRENT)
-        i_l2 = await self.client.read_u16(REG_L2_CURRENT)
-        i_l3 = await self.client.read_u16(REG_L3_CURRENT)
+    def _effective_intervals(self) -> dict[str, float]:
+        intervals = dict(self.tier_intervals)
+        if self.poll_mode == "idle":
+            for tier in intervals:
+                intervals[tier] = max(intervals[tier], self.idle_interval)
+        elif self.poll_mode == "burst":
+            intervals[TIER_FAST] = min(intervals[TIER_FAST], float(BURST_SCAN_INTERVAL))
+        return intervals
 
-        p_l1 = await self.client.read_u32(REG_L1_ACTIVE_POWER)
-        p_l2 = await self.client.read_u32(REG_L2_ACTIVE_POWER)
-        p_l3 = await self.client.read_u32(REG_L3_ACTIVE_POWER)
+    def _due_tiers(self, now: float) -> list[str]:
+        # Half a tick of slack absorbs scheduler jitter.
+        slack = self.poll_interval / 2
+        return [
+            tier
+            for tier, interval in self._effective_intervals().items()
+            if tier not in self._tier_last or now - self._tier_last[tier] >= interval - slack
+        ]
 
-        q_l1 = await self.client.read_u32(REG_L1_REACTIVE_POWER)
-        q_l2 = await self.client.read_u32(REG_L2_REACTIVE_POWER)
-        q_l3 = await self.client.read_u32(REG_L3_REACTIVE_POWER)
+    def _update_poll_mode(self, data: dict, now: float) -> None:
+        state = (data.get("charging_status"), data.get("cp_signal_status"))
+        if self._last_state is not None and state != self._last_state:
+            self._burst_until = now + BURST_DURATION
+        self._last_state = state
 
-        s_l1 = await self.client.read_u32(REG_L1_APPARENT_POWER)
-        s_l2 = await self.client.read_u32(REG_L2_APPARENT_POWER)
-        s_l3 = await self.client.read_u32(REG_L3_APPARENT_POWER)
+        if now < self._burst_until:
+            mode = "burst"
+        elif state[0] is not None and int(state[0]) in IDLE_CHARGING_STATUSES:
+            mode = "idle"
+        else:
+            mode = "active"
+        if mode != self.poll_mode:
+            _LOGGER.debug("%s polling mode %s -> %s", self.name, self.poll_mode, mode)
+            self.poll_mode = mode
+        self.poll_interval = min(self._effective_intervals().values())
+        # With slow polling, reconnecting per refresh is cheaper than holding
+        # one of the charger's few Modbus connection slots open.
+        self.client.set_idle_close(self.poll_interval / 2 if self.poll_interval >= IDLE_CLOSE_MIN_INTERVAL else None)
 
-        operating_mode = await self.client.read_u16(REG_OPERATING_MODE)
-        pwm_enabled = await self.client.read_u16(REG_PWM_ENABLED)
-        charging_mode = await self.client.read_u16(REG_CHARGING_MODE)
+    async def async_request_full_refresh(self) -> None:
+        """Request a refresh that reads every tier, e.g. after a control write."""
+        self._tier_last.clear()
+        await self.async_request_refresh()
 
-        cp_signal = await self.client.read_u16(REG_CP_SIGNAL_STATUS)
-        lb_enabled = await self.client.read_u16(REG_LOAD_BALANCING_ENABLED)
-        solar_enabled = await self.client.read_u16(REG_SOLAR_BALANCING_ENABLED)
-        cp_acq = await self.client.read_u16(REG_CP_ACQ_VOLTAGE)
-        led = await self.client.read_u16(REG_LED_BRIGHTNESS)
+    async def async_read_back(self, register: int) -> None:
+        """Re-read only the keys affected by a write to `register` and push them.
 
-        relay1 = await self.client.read_u16(REG_RELAY1_TEMP)
-        relay2 = await self.client.read_u16(REG_RELAY2_TEMP)
+        Every caller of one merged write (a slider burst) arrives here at
+        once; callers with no write in between share one read.
+        """
+        generation = self.client.write_generation
+        shared = self._read_backs.get(register)
+        if shared is None or shared[0] != generation:
+            shared = self._read_backs[register] = (generation, asyncio.create_task(self._read_back(register)))
+        await asyncio.shield(shared[1])
 
-        return {
-            "charging_status": status,
-            "power_w": power_w,
-            "duration_s": duration_s,
-            "energy_wh": energy_wh,
-            "phase_setting": phase,
-            "max_current": max_current,
-
-            "v_l1n": v_l1n, "v_l2n": v_l2n, "v_l3n": v_l3n,
-            "v_l12": v_l12, "v_l23": v_l23, "v_l31": v_l31,
-
-            "i_l1": i_l1, "i_l2": i_l2, "i_l3": i_l3,
-
-            "p_l1": p_l1, "p_l2": p_l2, "p_l3": p_l3,
-            "q_l1": q_l1, "q_l2": q_l2, "q_l3": q_l3,
-            "s_l1": s_l1, "s_l2": s_l2, "s_l3": s_l3,
-
-            "operating_mode": operating_mode,
-            "pwm_enabled": pwm_enabled,
-            "charging_mode": charging_mode,
-            "cp_signal_status": cp_signal,
-            "load_balancing_enabled": lb_enabled,
-            "solar_balancing_enabled": solar_enabled,
-            "cp_acq_voltage": cp_acq,
-            "led_brightness": led,
-
-            "relay1_temp": relay1,
-            "relay2_temp": relay2,
-        }
+    async def _read_back(self, register: int) -> None:
+        keys = WRITE_READBACK_KEYS.get(register)
+        if not keys:
+            await self.async_request_full_refresh()
+            return
+        deadline = Deadline(READBACK_BUDGET_S)
+        try:
+            # Someone is waiting on this read-back: it goes ahead of queued
+            # polls, and bypasses the cache since the write changed the device.
+            results = await asyncio.gather(
+                *(self._read_planned_block(b, deadline, PRIORITY_USER, max_age=0) for b in plan_reads(keys))
+            )
+        except Exception as err:
+            _LOGGER.debug("Read-back of %s failed (%s), requesting full refresh", register, err)
+            await self.async_request_full_refresh()
+            return
+
+        data: dict = dict(self.data or {})
+        now = self.hass.loop.time()
+        for part in results:
+            self._merge(data, part, now)
+        # Listeners fan out through the change diff, so only affected entities are written.
+        self.async_set_updated_data(data)
+
+    async def _read_all_data(self, deadline: Deadline | None = None) -> dict:
+        now = self.hass.loop.time()
+        tiers = self._due_tiers(now)
+        planned = self._plan(tiers)
+
+        # Blocks overlap on the wire when the client is pipelined; in
+        # lock-step mode the client lock serializes them. A failed block
+        # does not discard the others.
+        results = await asyncio.gather(
+            *(self._read_planned_block(b, deadline) for b in planned), return_exceptions=True
+        )
+
+        failed_tiers: set[str] = set()
+        errors: list[Exception] = []
+        fresh: set[str] = set()
+        for block, result in zip(planned, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                errors.append(result)
+                failed_tiers.update(REGISTER_TIERS.get(k, TIER_NORMAL) for k in block.keys)
+                self._mark_stale(block.keys)
+                continue
+            fresh.update(result)
+
+        # Decide before merging: a failed update is discarded by Home
+        # Assistant, so nothing may be marked as read or its tier as done.
+        if errors:
+            # Only keys that were due count, each against the longer of
+            # stale_after and its tier's interval: a slow tier polled less
+            # often than stale_after must not fail on one lost block.
+            intervals = self._effective_intervals()
+            missed = [(key, REGISTER_TIERS.get(key, TIER_NORMAL)) for key in self.polled_keys - fresh]
+            too_old = [
+                key for key, tier in missed
+                if tier in tiers
+                and now - self.key_updated.get(key, float("-inf")) > max(self.stale_after, intervals[tier])
+            ]
+            if too_old:
+                raise UpdateFailed(
+                    f"{len(too_old)} key(s) without a good read for over {self.stale_after:.0f}s "
+                    f"(last error: {type(errors[0]).__name__}: {errors[0]})"
+                ) from errors[0]
+            _LOGGER.debug(
+                "%s partial refresh: %s block(s) failed (%s), serving %s stale key(s)",
+                self.name, len(errors), errors[0], len(self.stale_keys),
+            )
+
+        data: dict = dict(self.data or {})
+        for result in results:
+            if not isinstance(result, BaseException):
+                self._merge(data, result, now)
+        for tier in tiers:
+            if tier not in failed_tiers:
+                self._tier_last[tier] = now
+
+        self._update_poll_mode(data, now)
+        self._store.async_delay_save(self._snapshot, STORAGE_SAVE_DELAY)
+        return data
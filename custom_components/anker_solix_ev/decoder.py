@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import struct
+from typing import Dict, List, Mapping, Tuple
+
+from .const import REGISTER_MAP, REGISTER_WIDTHS
+from .planner import ReadBlock
+
+# Big-endian struct codes per register type (words are always big-endian on the wire).
+_CODES = {"u16": "H", "s16": "h", "u32": "I", "s32": "i"}
+
+
+def _from_lo_hi(lo: int, hi: int, signed: bool) -> int:
+    value = (hi << 16) | lo
+    if signed and value & 0x80000000:
+        value -= 0x100000000
+    return value
+
+
+class BlockDecoder:
+    """Decode every key of a planned block from the raw response in one pass.
+
+    The layout is compiled once into a `struct.Struct` (gaps become pad
+    bytes), so a refresh costs a single `unpack_from` on a memoryview of
+    the response. With word order "lo_hi", 32-bit fields are unpacked as
+    two words and recombined.
+    """
+
+    def __init__(
+        self,
+        block: ReadBlock,
+        register_map: Mapping[str, Tuple[int, str]] = REGISTER_MAP,
+        word_order: str = "hi_lo",
+    ):
+        self.block = block
+        fmt: List[str] = [">"]
+        fields: List[Tuple[str, str]] = []
+        pos = 0
+        for key in sorted(block.keys, key=lambda k: register_map[k][0]):
+            register, kind = register_map[key]
+            offset = register - block.start
+            if offset < pos:
+                raise ValueError(f"Overlapping registers in block at {register} ({key})")
+            if offset > pos:
+                fmt.append(f"{2 * (offset - pos)}x")
+            if word_order == "lo_hi" and REGISTER_WIDTHS[kind] == 2:
+                fmt.append("HH")
+            else:
+                fmt.append(_CODES[kind])
+            fields.append((key, kind))
+            pos = offset + REGISTER_WIDTHS[kind]
+
+        self._struct = struct.Struct("".join(fmt))
+        self._fields = fields
+        self._keys = tuple(key for key, _kind in fields)
+        self._recombine = word_order == "lo_hi" and any(REGISTER_WIDTHS[k] == 2 for _key, k in fields)
+
+    def decode(self, payload: bytes | memoryview) -> Dict[str, int]:
+        if len(payload) < self._struct.size:
+            raise RuntimeError(f"Short block payload: expected {self._struct.size} bytes, got {len(payload)}")
+        values = self._struct.unpack_from(payload)
+        if not self._recombine:
+            return dict(zip(self._keys, values))
+
+        out: Dict[str, int] = {}
+        i = 0
+        for key, kind in self._fields:
+            if REGISTER_WIDTHS[kind] == 2:
+                out[key] = _from_lo_hi(values[i], values[i + 1], kind == "s32")
+                i += 2
+            else:
+                out[key] = values[i]
+                i += 1
+        return out
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from typing import Mapping
+
+from .const import REGISTER_GAINS
+
+_CURRENTS = ("i_l1", "i_l2", "i_l3")
+_REACTIVE = ("q_l1", "q_l2", "q_l3")
+_POWER_FACTORS = (("pf_l1", "p_l1", "s_l1"), ("pf_l2", "p_l2", "s_l2"), ("pf_l3", "p_l3", "s_l3"))
+
+
+def derive_values(data: Mapping[str, int]) -> dict:
+    """Scaled and derived values of one raw snapshot, computed in a single pass.
+
+    Keys with a gain are divided by it, other register keys are copied as
+    read. Derived keys (see DERIVED_SOURCES) are None when a source is
+    missing or the metric is undefined (e.g. power factor without load).
+    Results are rounded to what the entities display, so change-only
+    updates do not fire on float noise.
+    """
+    gains = REGISTER_GAINS
+    values = {key: raw / gains[key] if key in gains else raw for key, raw in data.items() if raw is not None}
+
+    currents = [values[k] for k in _CURRENTS if k in values]
+    values["i_total"] = round(sum(currents), 2) if currents else None
+
+    imbalance = None
+    if data.get("operating_mode") == 3 and len(currents) == 3:
+        mean = sum(currents) / 3
+        # Largest deviation from the mean phase current, in % of the mean.
+        imbalance = round(100 * max(abs(c - mean) for c in currents) / mean, 1) if mean > 0 else 0.0
+    values["current_imbalance"] = imbalance
+
+    for key, p_key, s_key in _POWER_FACTORS:
+        active, apparent = data.get(p_key), data.get(s_key)
+        values[key] = round(min(1.0, active / apparent), 2) if active is not None and apparent else None
+
+    reactive = [data[k] for k in _REACTIVE if data.get(k) is not None]
+    values["q_total"] = sum(reactive) if reactive else None
+    return values
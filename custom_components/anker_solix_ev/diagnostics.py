@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_HOST, DATA_SCHEDULER, DERIVED_SOURCES
+from .coordinator import AnkerSolixCoordinator
+
+TO_REDACT = {CONF_HOST}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    coord: AnkerSolixCoordinator = hass.data[DOMAIN][entry.entry_id]
+    scheduler = hass.data[DOMAIN].get(DATA_SCHEDULER)
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "coordinator": {
+            "last_update_success": coord.last_update_success,
+            "poll_mode": coord.poll_mode,
+            "poll_interval_s": coord.poll_interval,
+            "poll_lag_s": scheduler.lag.get(entry.entry_id) if scheduler is not None else None,
+            "tier_intervals_s": coord.tier_intervals,
+            "data": coord.data,
+            "derived": {key: coord.values.get(key) for key in DERIVED_SOURCES},
+            "stale_keys": sorted(coord.stale_keys),
+        },
+        "transport": coord.client.stats.as_dict(),
+        "cache": coord.client.cache.as_dict(),
+    }
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from .codec import ModbusException, words
+from .const import MAX_READ_QUANTITY
+from .modbus_client import PRIORITY_POLL, AnkerModbusClient, CircuitOpenError
+
+_ILLEGAL_ADDRESS = 2
+_CSV_FIELDS = ("register", "fc", "value", "hex", "error")
+
+Row = Dict[str, object]
+
+
+@dataclass
+class DumpResult:
+    """Counts of one register scan."""
+
+    registers: int = 0
+    holes: int = 0
+    errors: int = 0
+    requests: int = 0
+
+
+def parse_ranges(text: str) -> List[Tuple[int, int]]:
+    """Parse "20000-20120, 21000" into (start, quantity) pairs; ends are inclusive."""
+    ranges: List[Tuple[int, int]] = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        if not 0 <= start <= end <= 0xFFFF:
+            raise ValueError(f"Invalid register range: {part}")
+        ranges.append((start, end - start + 1))
+    if not ranges:
+        raise ValueError("No register range given")
+    return ranges
+
+
+def format_rows(rows: List[Row], fmt: str, header: bool = False) -> str:
+    if fmt == "jsonl":
+        return "".join(json.dumps(row) + "\n" for row in rows)
+    out = io.StringIO()
+    writer = csv.DictWriter(out, _CSV_FIELDS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+async def scan_registers(
+    client: AnkerModbusClient,
+    ranges: List[Tuple[int, int]],
+    emit: Callable[[List[Row]], Awaitable[None]],
+) -> DumpResult:
+    """Read every register of `ranges` and hand the rows to `emit` chunk by chunk.
+
+    Chunks are as large as the protocol allows and each one is its own
+    exchange at poll priority, so regular polls and writes interleave with
+    the scan. A chunk is tried with FC03 and FC04 (the function code that
+    answered last goes first); when both report an illegal address it is
+    split in half until the holes are single registers.
+    """
+    result = DumpResult()
+    fcs = [0x03, 0x04]
+    for range_start, range_qty in ranges:
+        chunks = [
+            (start, min(MAX_READ_QUANTITY, range_start + range_qty - start))
+            for start in range(range_start, range_start + range_qty, MAX_READ_QUANTITY)
+        ]
+        chunks.reverse()  # popped from the end, so the scan runs in register order
+        while chunks:
+            start, qty = chunks.pop()
+            rows, illegal = await _read_chunk(client, start, qty, fcs, result)
+            if illegal and qty > 1:
+                half = qty // 2
+                chunks.append((start + half, qty - half))
+                chunks.append((start, half))
+                continue
+            if illegal:
+                result.holes += 1
+            await emit(rows)
+    return result
+
+
+async def _read_chunk(
+    client: AnkerModbusClient, start: int, qty: int, fcs: List[int], result: DumpResult
+) -> Tuple[List[Row], bool]:
+    """Rows for one chunk, and whether every function code reported an illegal address."""
+    error: str | None = None
+    for fc in list(fcs):
+        result.requests += 1
+        try:
+            payload = await client.read_block_uncached(start, qty, fc, priority=PRIORITY_POLL)
+        except ModbusException as err:
+            if err.code == _ILLEGAL_ADDRESS:
+                continue
+            error = f"exception code {err.code}"
+            break
+        except CircuitOpenError:
+            raise
+        except (TimeoutError, ConnectionError, OSError, RuntimeError) as err:
+            error = str(err) or type(err).__name__
+            break
+        if fcs[0] != fc:
+            fcs.reverse()
+        result.registers += qty
+        return [
+            {"register": start + i, "fc": fc, "value": value, "hex": f"0x{value:04X}", "error": None}
+            for i, value in enumerate(words(payload))
+        ], False
+    illegal = error is None
+    if illegal:
+        error = "illegal address"
+    else:
+        result.errors += qty
+    rows = [{"register": start + i, "fc": None, "value": None, "hex": None, "error": error} for i in range(qty)]
+    return rows, illegal
@@ -1,232 +1,1119 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
-from typing import List, Tuple
+import heapq
+import itertools
+import logging
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Tuple
 
-MBAP_HEADER_LEN = 7  # TID(2) + PID(2) + LEN(2) + UID(1)
-PID_MODBUS = 0
-UID_DEFAULT = 1
+from . import codec
+from .cache import RegisterCache
+from .capture import KIND_LOST, KIND_OPEN, KIND_RX, KIND_TX, CaptureWriter, ReplayLog
+from .codec import UID_DEFAULT, FrameDecoder, FrameEncoder, FrameError, ModbusException
 
+# Request priorities, most urgent first: control writes, reads a user is
+# waiting on (e.g. read-back after a write), background polling.
+PRIORITY_CONTROL = 0
+PRIORITY_USER = 1
+PRIORITY_POLL = 2
+PRIORITY_NAMES = {PRIORITY_CONTROL: "control", PRIORITY_USER: "user", PRIORITY_POLL: "poll"}
 
-class ModbusException(Exception):
-    def __init__(self, fc: int, code: int | None):
-        self.fc = fc
-        self.code = code
-        super().__init__(f"Modbus exception (fc=0x{fc:02X}, code={code})")
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The caller's time budget ran out before the exchange could complete."""
+
+
+class Deadline:
+    """Absolute time budget shared by every exchange of one operation (e.g. a refresh)."""
+
+    def __init__(self, budget_s: float):
+        self.budget_s = float(budget_s)
+        self._expires = time.monotonic() + self.budget_s
+
+    def remaining(self) -> float:
+        return self._expires - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def check(self) -> float:
+        left = self.remaining()
+        if left <= 0.0:
+            raise DeadlineExceeded(f"Deadline of {self.budget_s:.1f}s exceeded")
+        return left
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised without touching the network while the charger is known to be down."""
+
+
+class PriorityGate:
+    """Counting semaphore that hands a freed slot to the most urgent waiter.
+
+    Waiters of equal priority are served in arrival order. Also usable as
+    `async with gate:` at poll priority.
+    """
+
+    def __init__(self, slots: int = 1):
+        self._free = max(1, int(slots))
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    def locked(self) -> bool:
+        return self._free <= 0
+
+    async def acquire(self, priority: int = PRIORITY_POLL) -> None:
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Granted just as we were cancelled: pass the slot on. Otherwise
+            # the cancelled future stays queued and release() skips it.
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _prio, _seq, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._free += 1
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
 
 
 @dataclass
 class ModbusSettings:
     host: str
     port: int
+    unit_id: int = UID_DEFAULT  # MBAP unit identifier (charger address behind a gateway)
     address_offset: int = 0
     word_order: str = "hi_lo"  # or "lo_hi"
     connect_timeout: float = 5.0
-    response_timeout: float = 5.0
+    response_timeout: float = 5.0  # initial value when adaptive, fixed otherwise
     retries: int = 2
-    retry_delay_s: float = 0.3
+    retry_delay_s: float = 0.3  # first backoff step, doubled per attempt with jitter
+    retry_delay_max_s: float = 2.0
+    adaptive_timeout: bool = True  # derive the response timeout from measured RTT (RFC 6298)
+    min_response_timeout: float = 0.3
+    max_response_timeout: float = 5.0
+    breaker_threshold: int = 3  # consecutive failed exchanges before failing fast
+    breaker_cooldown_s: float = 5.0  # doubled on each failed probe, up to breaker_cooldown_max_s
+    breaker_cooldown_max_s: float = 60.0
+    pipeline_depth: int = 1  # >1: several transactions in flight, demuxed by TID
+    write_debounce_s: float = 0.3  # quiet period before queued writes are flushed
+    write_max_delay_s: float = 1.0  # upper bound on how long a queued write waits
+    keepalive_idle_s: int = 10  # TCP keepalive: idle seconds before the first probe (0 = off)
+    monitor_interval_s: float = 5.0  # how often the idle connection is checked
+    probe_register: int | None = None  # register read as a liveness probe on idle sockets
+    probe_idle_s: float = 20.0  # idle time before the liveness probe
+    idle_close_s: float | None = None  # close sockets idle this long (frees device slots)
+    cache_ttls: Dict[int, float] = field(default_factory=dict)  # register -> seconds a read stays valid
+    cache_default_ttl: float = 0.0  # registers without a TTL are not cached
+    capture_path: str | None = None  # record every frame sent and received to this file
+    replay: ReplayLog | None = None  # answer from a capture instead of connecting
 
 
-class AnkerModbusClient:
-    """Minimal Modbus TCP client (asyncio), no pymodbus.
+RTT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
 
-    Reads:
-      - FC03 (holding registers), auto-fallback to FC04 (input registers) on
-        Illegal Data Address (exception code 2).
-    Writes:
-      - FC06 (write single register).
+
+@dataclass
+class RttHistogram:
+    count: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(RTT_BUCKETS_MS) + 1))
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        ms = seconds * 1000.0
+        for i, bound in enumerate(RTT_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    @property
+    def mean_s(self) -> float | None:
+        return self.total_s / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        labels = [f"<={b}ms" for b in RTT_BUCKETS_MS] + [f">{RTT_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.mean_s, 2) if self.count else None,
+            "max_ms": round(1000 * self.max_s, 2),
+            "histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+@dataclass
+class UnitStats:
+    """Counters of the exchanges addressed to one unit ID on a transport."""
+
+    requests: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    breaker_trips: int = 0
+    fast_failures: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "breaker_trips": self.breaker_trips,
+            "fast_failures": self.fast_failures,
+        }
+
+
+@dataclass
+class TransportStats:
+    """Counters kept by AnkerModbusClient to tell network from device problems.
+
+    The request counters are totals over every unit on the connection; the
+    same counters per unit ID are in `units`.
+    """
+
+    requests: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    connects: int = 0
+    reconnects: int = 0
+    tid_mismatches: int = 0
+    bytes_out: int = 0
+    bytes_in: int = 0
+    breaker_trips: int = 0
+    fast_failures: int = 0
+    queue_wait: Dict[str, RttHistogram] = field(default_factory=dict)
+    half_closes: int = 0
+    probes: int = 0
+    idle_closes: int = 0
+    srtt_s: Dict[int, float] = field(default_factory=dict)  # by unit ID
+    rto_s: Dict[int, float] = field(default_factory=dict)
+    rtt: Dict[int, RttHistogram] = field(default_factory=dict)
+    units: Dict[int, UnitStats] = field(default_factory=dict)
+
+    def record_rtt(self, fc: int, seconds: float) -> None:
+        hist = self.rtt.get(fc)
+        if hist is None:
+            hist = self.rtt[fc] = RttHistogram()
+        hist.add(seconds)
+
+    def record_queue_wait(self, priority: int, seconds: float) -> None:
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        hist = self.queue_wait.get(name)
+        if hist is None:
+            hist = self.queue_wait[name] = RttHistogram()
+        hist.add(seconds)
+
+    @property
+    def mean_rtt_s(self) -> float | None:
+        count = sum(h.count for h in self.rtt.values())
+        if not count:
+            return None
+        return sum(h.total_s for h in self.rtt.values()) / count
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "tid_mismatches": self.tid_mismatches,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "breaker_trips": self.breaker_trips,
+            "fast_failures": self.fast_failures,
+            "half_closes": self.half_closes,
+            "probes": self.probes,
+            "idle_closes": self.idle_closes,
+            "srtt_ms": {str(unit): round(1000 * s, 2) for unit, s in sorted(self.srtt_s.items())},
+            "rto_ms": {str(unit): round(1000 * s, 2) for unit, s in sorted(self.rto_s.items())},
+            "rtt": {f"fc{fc:02d}": hist.as_dict() for fc, hist in sorted(self.rtt.items())},
+            "queue_wait": {name: hist.as_dict() for name, hist in sorted(self.queue_wait.items())},
+            "units": {str(unit): stats.as_dict() for unit, stats in sorted(self.units.items())},
+        }
+
+
+@dataclass
+class _UnitState:
+    """RTT estimate and circuit breaker of one unit ID on a transport."""
+
+    unit_id: int
+    rto: float
+    breaker_cooldown: float
+    srtt: float | None = None
+    rttvar: float = 0.0
+    timed_out: bool = False  # the last exchange ran into its response timeout
+    breaker_failures: int = 0
+    breaker_open_until: float = 0.0
+    breaker_probing: bool = False
+    stats: UnitStats = field(default_factory=UnitStats)
+
+
+class _ModbusProtocol(asyncio.BufferedProtocol):
+    """Socket side of a ModbusTransport: received bytes land in the codec's buffer."""
+
+    def __init__(
+        self,
+        on_frame: Callable[[int, int, bytes], None],
+        on_lost: Callable[[_ModbusProtocol, Exception | None], None],
+    ):
+        self._decoder = FrameDecoder()
+        self._on_frame = on_frame
+        self._on_lost = on_lost
+        self.transport: asyncio.Transport | None = None
+        self.eof = False
+        self.capture: CaptureWriter | None = None
+        self._rx: memoryview | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        self._rx = self._decoder.get_buffer()
+        return self._rx
+
+    def buffer_updated(self, nbytes: int) -> None:
+        if self.capture is not None:
+            self.capture.record(KIND_RX, self._rx[:nbytes])
+        try:
+            frames = self._decoder.buffer_updated(nbytes)
+        except FrameError as err:
+            _LOGGER.debug("Modbus stream corrupt, resetting connection: %s", err)
+            self.transport.abort()
+            self._on_lost(self, err)
+            return
+        for tid, unit_id, pdu in frames:
+            self._on_frame(tid, unit_id, pdu)
+
+    def eof_received(self) -> bool:
+        self.eof = True
+        return False  # close our side too
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._on_lost(self, exc)
+
+
+class ModbusTransport:
+    """One Modbus TCP connection, shared by every unit ID behind host:port.
+
+    Framing lives in the sans-IO `codec` module; an `asyncio.BufferedProtocol`
+    parses responses straight out of one reusable receive buffer and routes
+    them to waiters by TID. With `pipeline_depth > 1` up to that many
+    transactions share the socket at once; otherwise one at a time.
+
+    Response timeouts follow the measured RTT (SRTT + 4*RTTVAR, as TCP's
+    RTO), retries back off exponentially with jitter, and a circuit breaker
+    fails fast after `breaker_threshold` consecutive failed exchanges until
+    a single probe succeeds again. RTT and breaker are kept per unit ID, so
+    one unresponsive charger behind a gateway does not fail the others.
+
+    Sockets use TCP keepalive. While connected, a monitor task reconnects
+    in the background when the peer half-closes, sends the probe request
+    once the socket has been idle for `probe_idle_s`, and closes it after
+    the idle-close delay every user agreed on.
     """
 
-    def __init__(self, settings: ModbusSettings):
+    def __init__(self, settings: ModbusSettings, limiter: PriorityGate | None = None):
         self._s = settings
+        self._limiter = limiter
         self._lock = asyncio.Lock()
         self._tid = 0
-        self._reader: asyncio.StreamReader | None = None
-        self._writer: asyncio.StreamWriter | None = None
+        self._proto: _ModbusProtocol | None = None
+        self._encoder = FrameEncoder()
+        # Requests queue here by priority; one slot in lock-step mode, one
+        # per in-flight transaction when pipelined.
+        self._gate = PriorityGate(max(1, int(settings.pipeline_depth)))
+        self._pending: Dict[int, asyncio.Future] = {}
+        self.stats = TransportStats()
+        self._units: Dict[int, _UnitState] = {}
+        self._last_activity = 0.0
+        self._closed = False
+        self._monitor_task: asyncio.Task | None = None
+        self._idle_close: Dict[int, float | None] = {}
+        self._probe: Tuple[int, bytes] | None = None
+        self._capture: CaptureWriter | None = None
+        if settings.capture_path:
+            self.start_capture(settings.capture_path)
 
-    def _addr(self, register: int) -> int:
-        return register + self._s.address_offset
+    def set_idle_close(self, owner: int, seconds: float | None) -> None:
+        """Record `owner`'s idle-close wish; None from any owner keeps the socket open."""
+        self._idle_close[owner] = seconds
+
+    def drop_owner(self, owner: int) -> None:
+        self._idle_close.pop(owner, None)
+
+    def _idle_close_after(self) -> float | None:
+        wishes = list(self._idle_close.values())
+        if not wishes or any(s is None for s in wishes):
+            return None
+        return min(wishes)
+
+    def set_probe(self, unit_id: int, pdu: bytes) -> None:
+        """Request sent as a liveness probe on an idle socket (first caller wins)."""
+        if self._probe is None:
+            self._probe = (unit_id, pdu)
+
+    @property
+    def capturing(self) -> bool:
+        return self._capture is not None
+
+    def start_capture(self, path: str) -> None:
+        """Record every frame on this connection (all units) to `path`."""
+        if self._capture is not None:
+            raise RuntimeError(f"Already capturing to {self._capture.path}")
+        self._capture = CaptureWriter(path)
+        if self._proto is not None:
+            self._capture.record(KIND_OPEN, f"{self._s.host}:{self._s.port}".encode())
+            self._proto.capture = self._capture
+
+    async def stop_capture(self) -> int:
+        """Stop recording and flush the file; returns the number of records."""
+        capture, self._capture = self._capture, None
+        if capture is None:
+            return 0
+        if self._proto is not None:
+            self._proto.capture = None
+        await capture.close()
+        return capture.records
+
+    async def close(self) -> None:
+        self._closed = True
+        task = self._monitor_task
+        self._monitor_task = None
+        if task is not None:
+            task.cancel()
+        async with self._lock:
+            await self._close_socket()
+        await self.stop_capture()
+
+    @property
+    def pipelined(self) -> bool:
+        return int(self._s.pipeline_depth) > 1
 
     def _next_tid(self) -> int:
         self._tid = (self._tid + 1) & 0xFFFF
+        while self._tid in self._pending:
+            self._tid = (self._tid + 1) & 0xFFFF
         return self._tid
 
-    @staticmethod
-    def _u32_from_words(words: list[int], word_order: str) -> int:
-        w0, w1 = words[0] & 0xFFFF, words[1] & 0xFFFF
-        if word_order == "hi_lo":
-            hi, lo = w0, w1
+    def _unit(self, unit_id: int) -> _UnitState:
+        unit = self._units.get(unit_id)
+        if unit is None:
+            unit = self._units[unit_id] = _UnitState(
+                unit_id, float(self._s.response_timeout), float(self._s.breaker_cooldown_s)
+            )
+            self.stats.units[unit_id] = unit.stats
+        return unit
+
+    def unit_stats(self, unit_id: int) -> UnitStats:
+        return self._unit(unit_id).stats
+
+    def _response_timeout(self, unit: _UnitState, deadline: Deadline | None = None) -> float:
+        timeout = unit.rto if self._s.adaptive_timeout else float(self._s.response_timeout)
+        if deadline is not None:
+            timeout = min(timeout, deadline.check())
+        return timeout
+
+    def _sample_rtt(self, unit: _UnitState, fc: int, seconds: float) -> None:
+        self.stats.record_rtt(fc, seconds)
+        unit.timed_out = False
+        if unit.srtt is None:
+            unit.srtt = seconds
+            unit.rttvar = seconds / 2
         else:
-            hi, lo = w1, w0
-        return (hi << 16) | lo
+            unit.rttvar = 0.75 * unit.rttvar + 0.25 * abs(unit.srtt - seconds)
+            unit.srtt = 0.875 * unit.srtt + 0.125 * seconds
+        rto = unit.srtt + max(0.05, 4 * unit.rttvar)
+        unit.rto = min(self._s.max_response_timeout, max(self._s.min_response_timeout, rto))
+        self.stats.srtt_s[unit.unit_id] = unit.srtt
+        self.stats.rto_s[unit.unit_id] = unit.rto
 
-    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    def _on_timeout(self, unit: _UnitState) -> None:
+        # Karn/RFC 6298 backoff: a timeout doubles the RTO until a new sample arrives.
+        unit.rto = min(self._s.max_response_timeout, unit.rto * 2)
+        self.stats.rto_s[unit.unit_id] = unit.rto
+
+    def _retry_delay(self, attempt: int) -> float:
+        base = max(0.0, float(self._s.retry_delay_s)) * (2 ** (attempt - 1))
+        return min(float(self._s.retry_delay_max_s), base) * random.uniform(0.5, 1.5)
+
+    def _breaker_tripped(self, unit: _UnitState) -> bool:
+        """True while the circuit is open or waiting for its probe to succeed."""
+        return unit.breaker_failures >= self._s.breaker_threshold
+
+    def _breaker_check(self, unit: _UnitState) -> bool:
+        """Raise while the circuit is open; return True if this call is the half-open probe."""
+        if not self._breaker_tripped(unit):
+            return False
+        if time.monotonic() >= unit.breaker_open_until and not unit.breaker_probing:
+            unit.breaker_probing = True  # half-open: let exactly one exchange through
+            return True
+        self.stats.fast_failures += 1
+        unit.stats.fast_failures += 1
+        raise CircuitOpenError(f"Modbus circuit open for {self._s.host}:{self._s.port} unit {unit.unit_id}")
+
+    def _breaker_success(self, unit: _UnitState) -> None:
+        if self._breaker_tripped(unit):
+            _LOGGER.debug("Modbus circuit closed for %s:%s unit %s", self._s.host, self._s.port, unit.unit_id)
+        unit.breaker_failures = 0
+        unit.breaker_probing = False
+        unit.breaker_cooldown = float(self._s.breaker_cooldown_s)
+
+    def _breaker_failure(self, unit: _UnitState) -> None:
+        unit.breaker_failures += 1
+        if not self._breaker_tripped(unit):
+            return
+        if unit.breaker_probing:
+            unit.breaker_cooldown = min(self._s.breaker_cooldown_max_s, unit.breaker_cooldown * 2)
+        else:
+            self.stats.breaker_trips += 1
+            unit.stats.breaker_trips += 1
+        unit.breaker_probing = False
+        unit.breaker_open_until = time.monotonic() + unit.breaker_cooldown
+        _LOGGER.debug(
+            "Modbus circuit open for %s:%s unit %s, next probe in %.1fs",
+            self._s.host, self._s.port, unit.unit_id, unit.breaker_cooldown,
+        )
+
+    async def _open(self, deadline: Deadline | None = None) -> _ModbusProtocol:
+        timeout = float(self._s.connect_timeout)
+        if deadline is not None:
+            timeout = min(timeout, deadline.check())
+        if self._s.replay is not None:
+            proto = _ModbusProtocol(self._on_frame, self._on_lost)
+            self._s.replay.connect(proto)
+            return proto
+        loop = asyncio.get_running_loop()
         try:
-            return await asyncio.wait_for(
-                asyncio.open_connection(self._s.host, self._s.port),
-                timeout=self._s.connect_timeout,
+            _transport, proto = await asyncio.wait_for(
+                loop.create_connection(
+                    lambda: _ModbusProtocol(self._on_frame, self._on_lost), self._s.host, self._s.port
+                ),
+                timeout=timeout,
             )
         except Exception as e:
             raise ConnectionError(
                 f"TCP connect failed to {self._s.host}:{self._s.port} ({type(e).__name__}: {e})"
             ) from e
+        return proto
 
     async def _close_socket(self) -> None:
-        writer = self._writer
-        self._reader = None
-        self._writer = None
-        if writer is None:
+        proto = self._proto
+        self._proto = None
+        self._fail_pending(ConnectionError("Modbus connection closed"))
+        if proto is not None and proto.transport is not None:
+            proto.transport.close()
+
+    def _on_frame(self, tid: int, unit_id: int, pdu: bytes) -> None:
+        self.stats.bytes_in += codec.MBAP_HEADER_LEN + len(pdu)
+        fut = self._pending.pop(tid, None)
+        if fut is None or fut.done():
+            # Late answer to a timed-out request; the stream stays in sync.
+            self.stats.tid_mismatches += 1
+            _LOGGER.debug("Dropping Modbus response for unknown TID %s", tid)
             return
-        try:
-            writer.close()
-            await writer.wait_closed()
-        except Exception:
-            pass
+        fut.set_result(pdu)
 
-    async def close(self) -> None:
-        async with self._lock:
-            await self._close_socket()
+    def _on_lost(self, proto: _ModbusProtocol, exc: Exception | None) -> None:
+        if proto is not self._proto:
+            return  # already replaced or closed by us
+        self._proto = None
+        if proto.eof:
+            self.stats.half_closes += 1
+        if self._capture is not None:
+            self._capture.record(KIND_LOST, str(exc or "closed by peer").encode())
+        _LOGGER.debug("Modbus connection to %s:%s lost: %s", self._s.host, self._s.port, exc or "closed by peer")
+        self._fail_pending(exc if isinstance(exc, ConnectionError) else ConnectionError("Modbus connection lost"))
 
-    async def _ensure_connected(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
-        writer = self._writer
-        reader = self._reader
-        if reader is not None and writer is not None and not writer.is_closing():
-            return reader, writer
+    async def _ensure_connected(self, deadline: Deadline | None = None) -> _ModbusProtocol:
+        proto = self._proto
+        if proto is not None and not proto.transport.is_closing():
+            return proto
         await self._close_socket()
-        reader, writer = await self._open()
-        self._reader = reader
-        self._writer = writer
-        return reader, writer
+        if self._closed:
+            # A retry that outlived close() (wait_for may swallow its
+            # cancellation) must not open a connection nobody will close.
+            raise ConnectionError("Modbus connection closed")
+        proto = await self._open(deadline)
+        self._install(proto)
+        return proto
 
-    @staticmethod
-    def _build_mbap(tid: int, length: int, uid: int = UID_DEFAULT) -> bytes:
-        return (
-            tid.to_bytes(2, "big")
-            + PID_MODBUS.to_bytes(2, "big")
-            + length.to_bytes(2, "big")
-            + uid.to_bytes(1, "big")
-        )
+    def _install(self, proto: _ModbusProtocol) -> None:
+        self._set_keepalive(proto.transport)
+        if self.stats.connects:
+            self.stats.reconnects += 1
+            _LOGGER.debug("Reconnected to %s:%s", self._s.host, self._s.port)
+        self.stats.connects += 1
+        self._proto = proto
+        if self._capture is not None:
+            self._capture.record(KIND_OPEN, f"{self._s.host}:{self._s.port}".encode())
+            proto.capture = self._capture
+        self._last_activity = time.monotonic()
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._monitor())
 
-    async def _exchange(self, pdu: bytes) -> bytes:
-        reader, writer = await self._ensure_connected()
+    def _set_keepalive(self, transport: asyncio.BaseTransport) -> None:
+        idle = int(self._s.keepalive_idle_s)
+        sock = transport.get_extra_info("socket")
+        if sock is None or idle <= 0:
+            return
         try:
-            tid = self._next_tid()
-            mbap = self._build_mbap(tid, 1 + len(pdu), UID_DEFAULT)
-            writer.write(mbap + pdu)
-            await writer.drain()
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, idle // 2))
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+        except OSError as err:
+            _LOGGER.debug("Could not enable TCP keepalive: %s", err)
 
-            hdr = await asyncio.wait_for(
-                reader.readexactly(MBAP_HEADER_LEN),
-                timeout=self._s.response_timeout,
-            )
-            r_tid = int.from_bytes(hdr[0:2], "big")
-            r_pid = int.from_bytes(hdr[2:4], "big")
-            r_len = int.from_bytes(hdr[4:6], "big")
-
-            if r_pid != PID_MODBUS:
-                raise RuntimeError(f"Invalid Modbus PID: {r_pid}")
-            if r_tid != tid:
-                raise RuntimeError(f"Transaction ID mismatch: sent {tid}, got {r_tid}")
-
-            pdu_len = r_len - 1
-            if pdu_len <= 0:
-                raise RuntimeError(f"Invalid response length: {r_len}")
-
-            return await asyncio.wait_for(
-                reader.readexactly(pdu_len),
-                timeout=self._s.response_timeout,
-            )
-        except Exception:
-            await self._close_socket()
+    def _is_idle(self) -> bool:
+        return not self._gate.locked() and not self._lock.locked() and not self._pending
+
+    async def _monitor(self) -> None:
+        """Keep an idle persistent connection healthy, or release it."""
+        while True:
+            await asyncio.sleep(self._s.monitor_interval_s)
+            if not self._is_idle():
+                continue
+            idle = time.monotonic() - self._last_activity
+            try:
+                idle_close = self._idle_close_after()
+                if self._proto is None:
+                    if idle_close is not None:
+                        # Slow polling gives the slot back between polls
+                        # anyway; the next poll connects.
+                        self._monitor_task = None
+                        return
+                    # The peer closed the connection while we were idle:
+                    # reconnect now instead of on the next poll's clock,
+                    # unless the breakers say no unit behind it is answering.
+                    if self._units and all(self._breaker_tripped(u) for u in self._units.values()):
+                        continue
+                    # Connect outside the lock so a control write is never
+                    # stuck behind a background connect timeout.
+                    proto = await self._open()
+                    async with self._lock:
+                        if self._proto is None:
+                            self._install(proto)
+                            proto = None
+                    if proto is not None:
+                        proto.transport.close()  # a request connected first
+                elif idle_close is not None and idle >= idle_close:
+                    async with self._lock:
+                        if self._is_idle_for(idle_close):
+                            self.stats.idle_closes += 1
+                            _LOGGER.debug("Closing Modbus socket idle for %.0fs", idle)
+                            self._monitor_task = None
+                            await self._close_socket()
+                            return
+                elif self._probe is not None and idle >= self._s.probe_idle_s:
+                    # Any answer, exception responses included, proves the link is up.
+                    self.stats.probes += 1
+                    await self.exchange(*self._probe)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                _LOGGER.debug("Modbus connection check failed: %s: %s", type(err).__name__, err)
+
+    def _is_idle_for(self, seconds: float) -> bool:
+        return not self._pending and time.monotonic() - self._last_activity >= seconds
+
+    async def _exchange(
+        self, unit_id: int, pdu: bytes, deadline: Deadline | None = None, priority: int = PRIORITY_POLL
+    ) -> bytes:
+        queued = time.monotonic()
+        # The connection's own queue comes first: a request waiting behind
+        # its socket must not hold a fleet slot other chargers could use.
+        await self._gate.acquire(priority)
+        try:
+            limiter = self._limiter
+            if limiter is not None:
+                await limiter.acquire(priority)
+            try:
+                self.stats.record_queue_wait(priority, time.monotonic() - queued)
+                return await self._exchange_on_wire(unit_id, pdu, deadline)
+            finally:
+                if limiter is not None:
+                    limiter.release()
+        finally:
+            self._gate.release()
+
+    async def _exchange_on_wire(self, unit_id: int, pdu: bytes, deadline: Deadline | None = None) -> bytes:
+        unit = self._unit(unit_id)
+        async with self._lock:
+            # Checked before touching the socket so an expired budget never
+            # sends a request nobody waits for.
+            if deadline is not None:
+                deadline.check()
+            proto = await self._ensure_connected(deadline)
+            # Sized after connecting: a slow reconnect spends the same budget.
+            timeout = self._response_timeout(unit, deadline)
+            tid = self._next_tid()
+            fut: asyncio.Future = asyncio.get_running_loop().create_future()
+            self._pending[tid] = fut
+            frame = self._encoder.encode(tid, unit_id, pdu)
+            started = time.monotonic()
+            proto.transport.write(frame)
+            if self._capture is not None:
+                self._capture.record(KIND_TX, frame)
+            self.stats.bytes_out += len(frame)
+        try:
+            resp = await asyncio.wait_for(fut, timeout=timeout)
+        except TimeoutError:
+            unit.timed_out = True
+            if not self.pipelined and all(u.timed_out for u in self._units.values()):
+                # A lock-step device that missed one request is often wedged:
+                # start over on a fresh connection. Behind a gateway, only
+                # once no unit answers; the others still use this socket.
+                async with self._lock:
+                    if self._proto is proto:
+                        await self._close_socket()
             raise
+        finally:
+            self._pending.pop(tid, None)
+        self._sample_rtt(unit, pdu[0], time.monotonic() - started)
+        return resp
 
-    async def _exchange_with_retry(self, pdu: bytes) -> bytes:
+    def _fail_pending(self, err: Exception) -> None:
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for fut in pending:
+            if not fut.done():
+                fut.set_exception(err)
+
+    async def exchange(
+        self, unit_id: int, pdu: bytes, deadline: Deadline | None = None, priority: int = PRIORITY_POLL
+    ) -> bytes:
+        """Send one request PDU to `unit_id` and return the response PDU, with retries."""
+        unit = self._unit(unit_id)
+        probe = self._breaker_check(unit)
+        try:
+            return await self._exchange_with_retries(unit, pdu, deadline, priority)
+        finally:
+            if probe and unit.breaker_probing:
+                # The probe ended without a verdict (deadline, cancellation):
+                # let the next call probe instead of failing fast forever.
+                unit.breaker_probing = False
+
+    async def _exchange_with_retries(
+        self, unit: _UnitState, pdu: bytes, deadline: Deadline | None, priority: int
+    ) -> bytes:
         attempts = max(1, int(self._s.retries) + 1)
         last_err: Exception | None = None
         for attempt in range(1, attempts + 1):
+            if deadline is not None:
+                deadline.check()
+            self.stats.requests += 1
+            unit.stats.requests += 1
+            self._last_activity = time.monotonic()
             try:
-                return await self._exchange(pdu)
-            except (TimeoutError, ConnectionError, OSError, asyncio.IncompleteReadError) as err:
+                resp = await self._exchange(unit.unit_id, pdu, deadline, priority)
+            except DeadlineExceeded:
+                # The budget ran out, not the device: do not count it against the breaker.
+                raise
+            except (TimeoutError, ConnectionError, OSError) as err:
                 last_err = err
+                if isinstance(err, TimeoutError) and deadline is not None and deadline.expired:
+                    raise DeadlineExceeded(f"Deadline of {deadline.budget_s:.1f}s exceeded") from err
+                if isinstance(err, TimeoutError):
+                    self.stats.timeouts += 1
+                    unit.stats.timeouts += 1
+                    self._on_timeout(unit)
+                else:
+                    self.stats.errors += 1
+                    unit.stats.errors += 1
                 if attempt >= attempts:
                     break
-                await asyncio.sleep(max(0.0, float(self._s.retry_delay_s)))
+                delay = self._retry_delay(attempt)
+                if deadline is not None and deadline.remaining() <= delay + self._s.min_response_timeout:
+                    break  # no room left for another attempt
+                self.stats.retries += 1
+                unit.stats.retries += 1
+                _LOGGER.debug(
+                    "Modbus fc=0x%02X attempt %s/%s failed (%s), retrying in %.2fs",
+                    pdu[0], attempt, attempts, type(err).__name__, delay,
+                )
+                await asyncio.sleep(delay)
+            except Exception:
+                self.stats.errors += 1
+                unit.stats.errors += 1
+                self._breaker_failure(unit)
+                raise
+            else:
+                self._breaker_success(unit)
+                return resp
+        self._breaker_failure(unit)
         if last_err is not None:
             raise last_err
         raise RuntimeError("Unknown Modbus exchange retry failure")
 
-    @staticmethod
-    def _raise_if_exception(resp_pdu: bytes) -> None:
-        if not resp_pdu:
-            raise RuntimeError("Empty response PDU")
-        fc = resp_pdu[0]
-        if fc & 0x80:
-            code = resp_pdu[1] if len(resp_pdu) > 1 else None
-            raise ModbusException(fc=fc, code=code)
+
+class AnkerModbusClient:
+    """Minimal Modbus TCP client (asyncio), no pymodbus.
+
+    Reads:
+      - FC03 (holding registers), auto-fallback to FC04 (input registers) on
+        Illegal Data Address (exception code 2).
+    Writes:
+      - FC06 (write single register), FC16 (write multiple registers).
+      - `queue_write` debounces settings writes: repeated writes to one
+        register collapse to the last value, values already on the device
+        are skipped and adjacent registers go out as one FC16 request.
+
+    Reads go through `cache` (a RegisterCache with per-register TTLs), so
+    callers reading the same registers close together share one exchange.
+    With `capture_path` set (or after `start_capture`) every frame is
+    recorded with timestamps; `replay` answers from such a capture instead.
+    Requests are addressed to `unit_id` and go through a ModbusTransport.
+    Given a `pool`, clients for the same host:port share one transport, so
+    several chargers behind a gateway use a single TCP connection.
+    """
+
+    def __init__(
+        self, settings: ModbusSettings, limiter: PriorityGate | None = None, pool: ConnectionPool | None = None
+    ):
+        self._s = settings
+        self._pool = pool
+        self._t = pool.acquire(settings, limiter) if pool is not None else ModbusTransport(settings, limiter)
+        self._known: Dict[int, int] = {}
+        self._write_queue: Dict[int, Tuple[int, List[asyncio.Future]]] = {}
+        self._write_last = 0.0
+        self._write_task: asyncio.Task | None = None
+        # Bumped by every write that reached the device; tells read-backs apart.
+        self.write_generation = 0
+        self.cache = RegisterCache(settings.cache_ttls, settings.cache_default_ttl)
+        self._capture_owner = False
+        self._t.set_idle_close(id(self), settings.idle_close_s)
+        if settings.probe_register is not None:
+            addr = self._addr(settings.probe_register)
+            self._t.set_probe(settings.unit_id, b"\x03" + addr.to_bytes(2, "big") + (1).to_bytes(2, "big"))
+
+    @property
+    def stats(self) -> TransportStats:
+        """Counters of the underlying connection (shared with pooled clients)."""
+        return self._t.stats
+
+    @property
+    def unit_stats(self) -> UnitStats:
+        """Request, retry and timeout counters of this client's unit ID alone."""
+        return self._t.unit_stats(self._s.unit_id)
+
+    @property
+    def pipelined(self) -> bool:
+        return self._t.pipelined
+
+    def set_idle_close(self, seconds: float | None) -> None:
+        """Close the socket after `seconds` without traffic (None keeps it open)."""
+        self._t.set_idle_close(id(self), seconds)
+
+    @property
+    def capturing(self) -> bool:
+        return self._t.capturing
+
+    def start_capture(self, path: str) -> None:
+        """Record the connection's traffic to `path` (see capture.py); pooled units share it."""
+        self._t.start_capture(path)
+        self._capture_owner = True
+
+    async def stop_capture(self) -> int:
+        self._capture_owner = False
+        return await self._t.stop_capture()
+
+    async def close(self) -> None:
+        task = self._write_task
+        self._write_task = None
+        if task is not None:
+            task.cancel()
+        queue, self._write_queue = self._write_queue, {}
+        self._fail_writes(queue)
+        self._t.drop_owner(id(self))
+        if self._capture_owner:
+            await self.stop_capture()
+        if self._pool is not None:
+            await self._pool.release(self._t)
+        else:
+            await self._t.close()
+
+    async def _exchange(self, pdu: bytes, deadline: Deadline | None = None, priority: int = PRIORITY_POLL) -> bytes:
+        return await self._t.exchange(self._s.unit_id, pdu, deadline, priority)
+
+    def _addr(self, register: int) -> int:
+        return register + self._s.address_offset
 
     @staticmethod
-    def _parse_read_response(expected_fc: int, resp_pdu: bytes) -> List[int]:
-        AnkerModbusClient._raise_if_exception(resp_pdu)
-        if len(resp_pdu) < 2:
-            raise RuntimeError("Short read response")
-        fc = resp_pdu[0]
-        if fc != expected_fc:
-            raise RuntimeError(f"Unexpected function code in response: {fc}")
-        byte_count = resp_pdu[1]
-        data = resp_pdu[2:]
-        if len(data) != byte_count:
-            raise RuntimeError(f"Byte count mismatch: expected {byte_count}, got {len(data)}")
-        if byte_count % 2 != 0:
-            raise RuntimeError(f"Invalid byte_count (not even): {byte_count}")
-
-        regs: List[int] = []
-        for i in range(0, byte_count, 2):
-            regs.append(int.from_bytes(data[i : i + 2], "big"))
-        return regs
-
-    async def _read_regs(self, fc: int, start_addr: int, quantity: int) -> List[int]:
-        pdu = bytes([fc]) + start_addr.to_bytes(2, "big") + quantity.to_bytes(2, "big")
-        resp = await self._exchange_with_retry(pdu)
-        return self._parse_read_response(fc, resp)
-
-    async def _read_holding_with_fallback(self, addr: int, qty: int) -> List[int]:
+    def _u32_from_words(words: list[int], word_order: str) -> int:
+        w0, w1 = words[0] & 0xFFFF, words[1] & 0xFFFF
+        if word_order == "hi_lo":
+            hi, lo = w0, w1
+        else:
+            hi, lo = w1, w0
+        return (hi << 16) | lo
+
+    async def _read_raw(
+        self, fc: int, start_addr: int, quantity: int, deadline: Deadline | None = None, priority: int = PRIORITY_POLL
+    ) -> memoryview:
+        resp = await self._exchange(codec.read_request(fc, start_addr, quantity), deadline, priority)
+        return codec.read_payload(fc, resp)
+
+    async def _read_raw_with_fallback(
+        self, addr: int, qty: int, deadline: Deadline | None = None, priority: int = PRIORITY_POLL
+    ) -> memoryview:
         try:
-            return await self._read_regs(0x03, addr, qty)
+            return await self._read_raw(0x03, addr, qty, deadline, priority)
         except ModbusException as e:
             if e.code == 2:
-                return await self._read_regs(0x04, addr, qty)
+                return await self._read_raw(0x04, addr, qty, deadline, priority)
             raise
 
-    async def read_u16(self, register: int) -> int:
-        async with self._lock:
-            addr = self._addr(register)
-            regs = await self._read_holding_with_fallback(addr, 1)
-            return int(regs[0])
+    async def _read_registers(
+        self,
+        start_register: int,
+        quantity: int,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+        max_age: float | None = None,
+    ) -> bytes | memoryview:
+        addr = self._addr(start_register)
+        return await self.cache.read(
+            start_register,
+            quantity,
+            lambda: self._read_raw_with_fallback(addr, quantity, deadline, priority),
+            max_age,
+        )
 
-    async def read_u32(self, register: int) -> int:
-        async with self._lock:
-            addr = self._addr(register)
-            regs = await self._read_holding_with_fallback(addr, 2)
-            return self._u32_from_words(regs[:2], self._s.word_order)
+    async def read_u16(
+        self,
+        register: int,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+        max_age: float | None = None,
+    ) -> int:
+        regs = codec.words(await self._read_registers(register, 1, deadline, priority, max_age))
+        return int(regs[0])
 
-    async def read_block(self, start_register: int, quantity: int) -> List[int]:
+    async def read_u32(
+        self,
+        register: int,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+        max_age: float | None = None,
+    ) -> int:
+        regs = codec.words(await self._read_registers(register, 2, deadline, priority, max_age))
+        return self._u32_from_words(regs[:2], self._s.word_order)
+
+    async def read_s16(
+        self,
+        register: int,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+        max_age: float | None = None,
+    ) -> int:
+        value = await self.read_u16(register, deadline, priority, max_age)
+        return value - 0x10000 if value & 0x8000 else value
+
+    async def read_s32(
+        self,
+        register: int,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+        max_age: float | None = None,
+    ) -> int:
+        value = await self.read_u32(register, deadline, priority, max_age)
+        return value - 0x100000000 if value & 0x80000000 else value
+
+    async def read_block(
+        self,
+        start_register: int,
+        quantity: int,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+        max_age: float | None = None,
+    ) -> List[int]:
         """Read a contiguous register block and return uint16 words."""
-        async with self._lock:
-            addr = self._addr(start_register)
-            return await self._read_holding_with_fallback(addr, quantity)
+        return codec.words(await self._read_registers(start_register, quantity, deadline, priority, max_age))
 
-    async def write_u16(self, register: int, value: int) -> None:
-        async with self._lock:
-            addr = self._addr(register)
-            val = int(value) & 0xFFFF
-            pdu = b"\x06" + addr.to_bytes(2, "big") + val.to_bytes(2, "big")
-            resp = await self._exchange_with_retry(pdu)
-
-            self._raise_if_exception(resp)
-            if len(resp) != 5 or resp[0] != 0x06:
-                raise RuntimeError(f"Unexpected FC06 response: {resp!r}")
-            r_addr = int.from_bytes(resp[1:3], "big")
-            r_val = int.from_bytes(resp[3:5], "big")
-            if r_addr != addr or r_val != val:
-                raise RuntimeError(f"FC06 echo mismatch (addr {r_addr} val {r_val})")
+    async def read_block_raw(
+        self,
+        start_register: int,
+        quantity: int,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+        max_age: float | None = None,
+    ) -> bytes | memoryview:
+        """Read a contiguous register block and return its big-endian payload bytes.
+
+        `max_age` overrides the cache TTL of the registers; 0 always reads the device.
+        """
+        return await self._read_registers(start_register, quantity, deadline, priority, max_age)
+
+    async def read_block_uncached(
+        self,
+        start_register: int,
+        quantity: int,
+        fc: int = 0x03,
+        deadline: Deadline | None = None,
+        priority: int = PRIORITY_POLL,
+    ) -> memoryview:
+        """Read a block with exactly one function code, bypassing the cache and the FC04 fallback."""
+        return await self._read_raw(fc, self._addr(start_register), quantity, deadline, priority)
+
+    async def write_u16(self, register: int, value: int, deadline: Deadline | None = None) -> None:
+        addr = self._addr(register)
+        val = int(value) & 0xFFFF
+        self.cache.invalidate(register)
+        resp = await self._exchange(codec.write_single_request(addr, val), deadline, PRIORITY_CONTROL)
+        codec.check_write_echo(resp, 0x06, addr, val)
+        self._known[register] = val
+        self.write_generation += 1
+
+    async def write_registers(self, start_register: int, values: List[int]) -> None:
+        """FC16: write consecutive registers in one request."""
+        addr = self._addr(start_register)
+        vals = [int(v) & 0xFFFF for v in values]
+        self.cache.invalidate(start_register, len(vals))
+        resp = await self._exchange(codec.write_multiple_request(addr, vals), None, PRIORITY_CONTROL)
+        codec.check_write_echo(resp, 0x10, addr, len(vals))
+        for i, v in enumerate(vals):
+            self._known[start_register + i] = v
+        self.write_generation += 1
+
+    def note_values(self, values: Dict[int, int]) -> None:
+        """Record register values read from the device (used to skip no-op writes)."""
+        for register, value in values.items():
+            self._known[register] = int(value) & 0xFFFF
+
+    async def queue_write(self, register: int, value: int) -> None:
+        """Debounced write; returns once the value (or a newer one) reached the device."""
+        val = int(value) & 0xFFFF
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        _old, waiters = self._write_queue.get(register, (val, []))
+        waiters.append(fut)
+        self._write_queue[register] = (val, waiters)
+        self._write_last = loop.time()
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._flush_writes_later())
+        await fut
+
+    async def _flush_writes_later(self) -> None:
+        # Writes queued while a flush is on the wire land in the fresh queue;
+        # keep going until it stays empty so they are not left waiting.
+        while self._write_queue:
+            await self._flush_writes()
+
+    async def _flush_writes(self) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        debounce = max(0.0, float(self._s.write_debounce_s))
+        while True:
+            now = loop.time()
+            quiet_at = self._write_last + debounce
+            if now >= quiet_at or now - started >= self._s.write_max_delay_s:
+                break
+            await asyncio.sleep(min(quiet_at, started + self._s.write_max_delay_s) - now)
+
+        queue, self._write_queue = self._write_queue, {}
+        changed = {reg: val for reg, (val, _w) in queue.items() if self._known.get(reg) != val}
+
+        errors: Dict[int, Exception] = {}
+        try:
+            for start, values in self._runs(changed):
+                try:
+                    if len(values) == 1:
+                        await self.write_u16(start, values[0])
+                    else:
+                        await self.write_registers(start, values)
+                except Exception as err:  # reported to every waiter of the run
+                    for reg in range(start, start + len(values)):
+                        errors[reg] = err
+        except asyncio.CancelledError:
+            # close() cancelled the flush: these waiters are no longer in
+            # _write_queue, so nobody else would ever resolve them.
+            self._fail_writes(queue)
+            raise
+
+        for reg, (_val, waiters) in queue.items():
+            for fut in waiters:
+                if fut.done():
+                    continue
+                if reg in errors:
+                    fut.set_exception(errors[reg])
+                else:
+                    fut.set_result(None)
+
+    @staticmethod
+    def _fail_writes(queue: Dict[int, Tuple[int, List[asyncio.Future]]]) -> None:
+        for _value, waiters in queue.values():
+            for fut in waiters:
+                if not fut.done():
+                    fut.set_exception(ConnectionError("Modbus client closed"))
+
+    @staticmethod
+    def _runs(writes: Dict[int, int]) -> List[Tuple[int, List[int]]]:
+        runs: List[Tuple[int, List[int]]] = []
+        for reg in sorted(writes):
+            if runs and runs[-1][0] + len(runs[-1][1]) == reg and len(runs[-1][1]) < 123:
+                runs[-1][1].append(writes[reg])
+            else:
+                runs.append((reg, [writes[reg]]))
+        return runs
+
+
+class ConnectionPool:
+    """Hands out one shared ModbusTransport per host:port.
+
+    The first client's settings (timeouts, pipelining, breaker) configure
+    the shared connection; it is closed when its last client releases it.
+    """
+
+    def __init__(self):
+        self._transports: Dict[Tuple[str, int], Tuple[ModbusTransport, int]] = {}
+
+    @property
+    def empty(self) -> bool:
+        return not self._transports
+
+    def acquire(self, settings: ModbusSettings, limiter: PriorityGate | None = None) -> ModbusTransport:
+        key = (settings.host.lower(), int(settings.port))
+        transport, users = self._transports.get(key, (None, 0))
+        if transport is None:
+            transport = ModbusTransport(settings, limiter)
+        self._transports[key] = (transport, users + 1)
+        return transport
+
+    async def release(self, transport: ModbusTransport) -> None:
+        for key, (shared, users) in list(self._transports.items()):
+            if shared is transport:
+                if users > 1:
+                    self._transports[key] = (shared, users - 1)
+                    return
+                del self._transports[key]
+                break
+        await transport.close()
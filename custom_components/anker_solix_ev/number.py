@@ -21,15 +21,29 @@ class MaxCurrentNumber(NumberEntity):
     _attr_native_min_value = 0
     _attr_native_max_value = 32
     _attr_native_step = 1
+    _attr_should_poll = False
 
     def __init__(self, coordinator: AnkerSolixCoordinator, entry: ConfigEntry):
         self.coordinator = coordinator
         self.entry = entry
 
+    async def async_added_to_hass(self):
+        self.async_on_remove(
+            self.coordinator.async_add_key_listener(("max_current",), self.async_write_ha_state)
+        )
+
     @property
     def unique_id(self):
         return f"{self.entry.entry_id}_max_current"
 
+    @property
+    def available(self):
+        return self.coordinator.last_update_success
+
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.key_attributes("max_current")
+
     @property
     def native_value(self):
         value = self.coordinator.data.get("max_current")
@@ -43,10 +57,11 @@ class MaxCurrentNumber(NumberEntity):
         # exemple : 10A -> 100
         register_value = int(value) * 10
 
-        await self.coordinator.client.write_u16(
+        # écriture différée : un glissement du curseur ne produit qu'une requête
+        await self.coordinator.client.queue_write(
             REG_MAX_CURRENT,
             register_value,
         )
 
-        # relit les valeurs après écriture
-        await self.coordinator.async_request_refresh()
+        # relit uniquement le registre écrit
+        await self.coordinator.async_read_back(REG_MAX_CURRENT)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, List, Mapping, Tuple
+
+from .const import (
+    ALWAYS_POLLED_KEYS,
+    DERIVED_SOURCES,
+    MAX_READ_GAP,
+    MAX_READ_QUANTITY,
+    REGISTER_MAP,
+    REGISTER_TIERS,
+    REGISTER_WIDTHS,
+    TIER_NORMAL,
+)
+
+
+@dataclass(frozen=True)
+class ReadBlock:
+    """One FC03 request covering several keys of the register map."""
+
+    start: int
+    quantity: int
+    keys: Tuple[str, ...]
+
+    @property
+    def end(self) -> int:
+        return self.start + self.quantity
+
+
+def plan_reads(
+    keys: Iterable[str] | None = None,
+    register_map: Mapping[str, Tuple[int, str]] = REGISTER_MAP,
+    max_gap: int = MAX_READ_GAP,
+    max_quantity: int = MAX_READ_QUANTITY,
+) -> List[ReadBlock]:
+    """Merge the registers of `keys` into the fewest contiguous read blocks.
+
+    Two registers share a block when the hole between them is at most
+    `max_gap` words and the resulting block stays within `max_quantity`.
+    """
+    if keys is None:
+        keys = register_map.keys()
+
+    spans = sorted(
+        (register_map[key][0], REGISTER_WIDTHS[register_map[key][1]], key)
+        for key in keys
+    )
+
+    blocks: List[ReadBlock] = []
+    cur_start = cur_end = 0
+    cur_keys: List[str] = []
+    for register, width, key in spans:
+        end = register + width
+        if cur_keys and register - cur_end <= max_gap and max(end, cur_end) - cur_start <= max_quantity:
+            cur_end = max(cur_end, end)
+            cur_keys.append(key)
+            continue
+        if cur_keys:
+            blocks.append(ReadBlock(cur_start, cur_end - cur_start, tuple(cur_keys)))
+        cur_start, cur_end, cur_keys = register, end, [key]
+    if cur_keys:
+        blocks.append(ReadBlock(cur_start, cur_end - cur_start, tuple(cur_keys)))
+    return blocks
+
+
+def polled_keys(enabled: Iterable[str]) -> FrozenSet[str]:
+    """Register keys to poll for the `enabled` entity keys: their derived sources plus the always-polled ones."""
+    keys = set(enabled)
+    for key in DERIVED_SOURCES.keys() & keys:
+        keys.update(DERIVED_SOURCES[key])
+    return frozenset(k for k in REGISTER_MAP if k in keys or k in ALWAYS_POLLED_KEYS)
+
+
+def plan_tier_reads(keys: Iterable[str], tiers: Iterable[str]) -> List[ReadBlock]:
+    """Plan the `keys` of the due `tiers` as one set, so keys of different tiers share blocks."""
+    keys, due = set(keys), set(tiers)
+    return plan_reads([k for k in REGISTER_MAP if k in keys and REGISTER_TIERS.get(k, TIER_NORMAL) in due])
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from .const import (
+    REGISTER_MAP,
+    CHARGING_STATUS_MAP,
+    OPERATING_MODE_MAP,
+    CHARGING_MODE_MAP,
+    CP_ACQ_VOLTAGE_MAP,
+    PHASE_MAP,
+    PROBE_OFFSETS,
+    PROBE_WORD_ORDERS,
+    PROBE_BUDGET_S,
+)
+from .decoder import BlockDecoder
+from .modbus_client import AnkerModbusClient, ConnectionPool, Deadline, ModbusSettings
+from .planner import ReadBlock, plan_reads
+
+_LOGGER = logging.getLogger(__name__)
+
+_VOLTAGE_KEYS = ("v_l1n", "v_l2n", "v_l3n")
+_FLAG_KEYS = ("pwm_enabled", "cp_signal_status", "load_balancing_enabled", "solar_balancing_enabled")
+_ENUM_KEYS = {
+    "charging_status": CHARGING_STATUS_MAP,
+    "operating_mode": OPERATING_MODE_MAP,
+    "charging_mode": CHARGING_MODE_MAP,
+    "cp_acq_voltage": CP_ACQ_VOLTAGE_MAP,
+    "phase_setting": PHASE_MAP,
+}
+_POWER_KEYS = ("power_w", "p_l1", "p_l2", "p_l3", "q_l1", "q_l2", "q_l3", "s_l1", "s_l2", "s_l3")
+_MAX_POWER = 50_000  # W / var / VA, well above a 22 kW charger
+# Session counters survive the session, so they also decide the word order
+# on an idle charger, where every power reading is 0.
+_COUNTER_LIMITS = {"duration_s": 7 * 86400, "energy_wh": 500_000}
+
+
+@dataclass
+class ProbeResult:
+    """Best-scoring register layout found on the device."""
+
+    address_offset: int
+    word_order: str
+    score: int
+    data: Dict[str, int] = field(default_factory=dict)
+
+
+def score(data: Dict[str, int]) -> int:
+    """Plausibility of decoded values: positive means the layout looks right."""
+    points = 0
+    for key in _VOLTAGE_KEYS:
+        volts = data.get(key)
+        if volts is None or volts == 0:  # missing phase on single-phase installs
+            continue
+        points += 1 if 2000 <= volts <= 2500 else -1
+    for key, mapping in _ENUM_KEYS.items():
+        if key in data:
+            points += 1 if data[key] in mapping else -1
+    for key in _FLAG_KEYS:
+        if key in data:
+            points += 1 if data[key] in (0, 1) else -1
+    # A swapped word order turns a few hundred watts into millions.
+    for key in _POWER_KEYS:
+        value = data.get(key)
+        if value:
+            points += 1 if abs(value) <= _MAX_POWER else -1
+    for key, limit in _COUNTER_LIMITS.items():
+        value = data.get(key)
+        if value:
+            points += 1 if value <= limit else -1
+    return points
+
+
+async def _read_layout(
+    client: AnkerModbusClient, blocks: List[ReadBlock], deadline: Deadline
+) -> List[bytes | Exception]:
+    results: List[bytes | Exception] = []
+    for block in blocks:
+        try:
+            results.append(bytes(await client.read_block_raw(block.start, block.quantity, deadline)))
+        except Exception as err:  # a missing block only lowers the score
+            results.append(err)
+    return results
+
+
+async def _read_offsets(
+    host: str, port: int, unit_id: int, blocks: List[ReadBlock], pipeline_depth: int
+) -> Dict[int, List[bytes | Exception]]:
+    pool = ConnectionPool()
+    clients = {
+        offset: AnkerModbusClient(
+            ModbusSettings(
+                host=host,
+                port=port,
+                unit_id=unit_id,
+                address_offset=offset,
+                connect_timeout=3.0,
+                response_timeout=2.0,
+                retries=0,
+                pipeline_depth=pipeline_depth,
+            ),
+            pool=pool,
+        )
+        for offset in PROBE_OFFSETS
+    }
+    deadline = Deadline(PROBE_BUDGET_S)
+    try:
+        payloads = await asyncio.gather(
+            *(_read_layout(client, blocks, deadline) for client in clients.values())
+        )
+    finally:
+        for client in clients.values():
+            await client.close()
+    return dict(zip(clients, payloads))
+
+
+async def detect_layout(host: str, port: int, unit_id: int = 1) -> ProbeResult | None:
+    """Read the register map at every candidate offset and pick the most plausible layout.
+
+    The offsets are probed side by side on one connection, one request
+    each in flight; if that times out (a charger that only handles one
+    transaction at a time), they are probed again in lock-step. Word
+    orders are scored on the same bytes, so they cost no extra reads.
+    Returns None when nothing could be read or no layout scores above zero.
+    """
+    blocks = plan_reads(REGISTER_MAP)
+    payloads = await _read_offsets(host, port, unit_id, blocks, len(PROBE_OFFSETS))
+    if any(isinstance(r, TimeoutError) for raw in payloads.values() for r in raw):
+        _LOGGER.debug("Concurrent layout probe timed out, probing one request at a time")
+        payloads = await _read_offsets(host, port, unit_id, blocks, 1)
+
+    best: ProbeResult | None = None
+    for offset, raw in payloads.items():
+        for word_order in PROBE_WORD_ORDERS:
+            data: Dict[str, int] = {}
+            for block, payload in zip(blocks, raw):
+                if isinstance(payload, bytes):
+                    data.update(BlockDecoder(block, REGISTER_MAP, word_order).decode(payload))
+            if not data:
+                continue
+            points = score(data)
+            _LOGGER.debug("Probe offset=%s word_order=%s: score %s", offset, word_order, points)
+            # Candidates are ordered by preference, so ties keep the earlier one.
+            if best is None or points > best.score:
+                best = ProbeResult(offset, word_order, points, data)
+    if best is None or best.score <= 0:
+        errors = [r for raw in payloads.values() for r in raw if isinstance(r, Exception)]
+        _LOGGER.info(
+            "Could not detect the register layout of %s:%s (best score %s%s); using the defaults",
+            host, port, best.score if best else "-",
+            f", last error {type(errors[-1]).__name__}: {errors[-1]}" if errors else "",
+        )
+        return None
+    return best
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import TYPE_CHECKING, Dict
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, FLEET_MAX_CONCURRENT_EXCHANGES, FLEET_POLL_JITTER
+from .modbus_client import PriorityGate
+
+if TYPE_CHECKING:
+    from .coordinator import AnkerSolixCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FleetScheduler:
+    """Domain-wide polling engine shared by every charger entry.
+
+    Each charger gets a random phase inside its interval plus a small
+    per-cycle jitter so refreshes do not line up. `limiter` is handed to
+    every Modbus client and caps exchanges running at once across the fleet.
+    A request takes its connection's slot before a fleet slot, so a busy
+    charger does not hold slots the others could use; control writes go
+    ahead of queued polls in both queues.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_concurrent: int = FLEET_MAX_CONCURRENT_EXCHANGES):
+        self.hass = hass
+        self.limiter = PriorityGate(max(1, int(max_concurrent)))
+        self.lag: Dict[str, float] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def empty(self) -> bool:
+        return not self._tasks
+
+    def register(self, entry_id: str, coordinator: AnkerSolixCoordinator) -> None:
+        self.unregister(entry_id)
+        self._tasks[entry_id] = self.hass.async_create_background_task(
+            self._run(entry_id, coordinator), name=f"{DOMAIN} poll {entry_id}"
+        )
+
+    def unregister(self, entry_id: str) -> None:
+        task = self._tasks.pop(entry_id, None)
+        if task is not None:
+            task.cancel()
+        self.lag.pop(entry_id, None)
+
+    async def _run(self, entry_id: str, coordinator: AnkerSolixCoordinator) -> None:
+        loop = asyncio.get_running_loop()
+        due = loop.time() + random.uniform(0.0, coordinator.poll_interval)
+        while True:
+            await asyncio.sleep(max(0.0, due - loop.time()))
+
+            lag = max(0.0, loop.time() - due)
+            self.lag[entry_id] = lag
+            coordinator.poll_lag = lag
+
+            await coordinator.async_refresh()
+
+            interval = coordinator.poll_interval
+            due += interval * (1.0 + random.uniform(-FLEET_POLL_JITTER, FLEET_POLL_JITTER))
+            now = loop.time()
+            if due < now - interval:
+                # More than a full cycle behind: re-anchor instead of bursting.
+                _LOGGER.debug("%s poll overran by %.1fs, re-anchoring", entry_id, now - due)
+                due = now
@@ -18,15 +18,29 @@ class PhaseSelect(SelectEntity):
     _attr_has_entity_name = True
     _attr_name = "Phase Setting"
     _attr_options = list(PHASE_REVERSE_MAP.keys())
+    _attr_should_poll = False
 
     def __init__(self, coordinator: AnkerSolixCoordinator, entry: ConfigEntry):
         self.coordinator = coordinator
         self.entry = entry
 
+    async def async_added_to_hass(self):
+        self.async_on_remove(
+            self.coordinator.async_add_key_listener(("phase_setting",), self.async_write_ha_state)
+        )
+
     @property
     def unique_id(self):
         return f"{self.entry.entry_id}_phase_setting"
 
+    @property
+    def available(self):
+        return self.coordinator.last_update_success
+
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.key_attributes("phase_setting")
+
     @property
     def current_option(self):
         val = self.coordinator.data.get("phase_setting")
@@ -35,5 +49,5 @@ class PhaseSelect(SelectEntity):
         return PHASE_MAP.get(int(val))
 
     async def async_select_option(self, option: str) -> None:
-        await self.coordinator.client.write_u16(REG_PHASE_SETTING, PHASE_REVERSE_MAP[option])
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.client.queue_write(REG_PHASE_SETTING, PHASE_REVERSE_MAP[option])
+        await self.coordinator.async_read_back(REG_PHASE_SETTING)
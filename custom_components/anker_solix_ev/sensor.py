@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -23,16 +24,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         U32Sensor(coord, entry, "Session Energy", "energy_wh", "Wh"),
         U32Sensor(coord, entry, "Session Duration", "duration_s", "s"),
 
-        ScaledU16Sensor(coord, entry, "L1-N Voltage", "v_l1n", "V", 10),
-        ScaledU16Sensor(coord, entry, "L2-N Voltage", "v_l2n", "V", 10),
-        ScaledU16Sensor(coord, entry, "L3-N Voltage", "v_l3n", "V", 10),
-        ScaledU16Sensor(coord, entry, "L1-L2 Voltage", "v_l12", "V", 10),
-        ScaledU16Sensor(coord, entry, "L2-L3 Voltage", "v_l23", "V", 10),
-        ScaledU16Sensor(coord, entry, "L3-L1 Voltage", "v_l31", "V", 10),
+        ScaledU16Sensor(coord, entry, "L1-N Voltage", "v_l1n", "V"),
+        ScaledU16Sensor(coord, entry, "L2-N Voltage", "v_l2n", "V"),
+        ScaledU16Sensor(coord, entry, "L3-N Voltage", "v_l3n", "V"),
+        ScaledU16Sensor(coord, entry, "L1-L2 Voltage", "v_l12", "V"),
+        ScaledU16Sensor(coord, entry, "L2-L3 Voltage", "v_l23", "V"),
+        ScaledU16Sensor(coord, entry, "L3-L1 Voltage", "v_l31", "V"),
 
-        ScaledU16Sensor(coord, entry, "L1 Current", "i_l1", "A", 100),
-        ScaledU16Sensor(coord, entry, "L2 Current", "i_l2", "A", 100),
-        ScaledU16Sensor(coord, entry, "L3 Current", "i_l3", "A", 100),
+        ScaledU16Sensor(coord, entry, "L1 Current", "i_l1", "A"),
+        ScaledU16Sensor(coord, entry, "L2 Current", "i_l2", "A"),
+        ScaledU16Sensor(coord, entry, "L3 Current", "i_l3", "A"),
+        DerivedSensor(coord, entry, "Total Current", "i_total", "A", "current"),
+        DerivedSensor(coord, entry, "Current Imbalance", "current_imbalance", "%", None),
 
         U32Sensor(coord, entry, "L1 Active Power", "p_l1", "W"),
         U32Sensor(coord, entry, "L2 Active Power", "p_l2", "W"),
@@ -41,11 +44,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         U32Sensor(coord, entry, "L1 Reactive Power", "q_l1", "var"),
         U32Sensor(coord, entry, "L2 Reactive Power", "q_l2", "var"),
         U32Sensor(coord, entry, "L3 Reactive Power", "q_l3", "var"),
+        DerivedSensor(coord, entry, "Net Reactive Power", "q_total", "var", "reactive_power"),
 
         U32Sensor(coord, entry, "L1 Apparent Power", "s_l1", "VA"),
         U32Sensor(coord, entry, "L2 Apparent Power", "s_l2", "VA"),
         U32Sensor(coord, entry, "L3 Apparent Power", "s_l3", "VA"),
 
+        DerivedSensor(coord, entry, "L1 Power Factor", "pf_l1", None, "power_factor"),
+        DerivedSensor(coord, entry, "L2 Power Factor", "pf_l2", None, "power_factor"),
+        DerivedSensor(coord, entry, "L3 Power Factor", "pf_l3", None, "power_factor"),
+
         EnumSensor(coord, entry, "Operating Mode", "operating_mode", OPERATING_MODE_MAP),
         EnumSensor(coord, entry, "Charging Mode", "charging_mode", CHARGING_MODE_MAP),
         EnumSensor(coord, entry, "CP Acquisition Voltage", "cp_acq_voltage", CP_ACQ_VOLTAGE_MAP),
@@ -53,22 +61,53 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         U16Sensor(coord, entry, "LED Brightness", "led_brightness", "%"),
         U16Sensor(coord, entry, "Relay 1 Temperature", "relay1_temp", "°C"),
         U16Sensor(coord, entry, "Relay 2 Temperature", "relay2_temp", "°C"),
+
+        PollLagSensor(coord, entry),
+        RoundTripSensor(coord, entry),
+        UnitCounterSensor(coord, entry, "Modbus Retries", "retries"),
+        UnitCounterSensor(coord, entry, "Modbus Timeouts", "timeouts"),
+        TransportCounterSensor(coord, entry, "Modbus Connection Reconnects", "reconnects"),
+        TransportCounterSensor(coord, entry, "Modbus Connection TID Mismatches", "tid_mismatches"),
+        CacheHitRatioSensor(coord, entry),
     ])
 
 
 class _Base(SensorEntity):
     _attr_has_entity_name = True
+    _attr_should_poll = False
+    _key: str | None = None
 
     def __init__(self, coordinator: AnkerSolixCoordinator, entry: ConfigEntry):
         self.coordinator = coordinator
         self.entry = entry
 
     async def async_added_to_hass(self):
-        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        if self._key is None:
+            self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+        else:
+            self.async_on_remove(
+                self.coordinator.async_add_key_listener((self._key,), self.async_write_ha_state)
+            )
+
+    @property
+    def entity_registry_enabled_default(self) -> bool:
+        return self._key is None or self.coordinator.enabled_by_default(self._key)
+
+    @property
+    def available(self):
+        # Diagnostic entities stay available to show why the charger is not.
+        return self._key is None or self.coordinator.last_update_success
+
+    @property
+    def extra_state_attributes(self):
+        if self._key is None:
+            return None
+        return self.coordinator.key_attributes(self._key)
 
 
 class ChargingStatusSensor(_Base):
     _attr_name = "Charging Status"
+    _key = "charging_status"
 
     @property
     def unique_id(self):
@@ -88,6 +127,7 @@ class TotalActivePowerSensor(_Base):
     _attr_native_unit_of_measurement = "W"
     _attr_device_class = "power"
     _attr_state_class = "measurement"
+    _key = "power_w"
 
     @property
     def unique_id(self):
@@ -134,12 +174,13 @@ class U32Sensor(_Base):
 
 
 class ScaledU16Sensor(_Base):
-    def __init__(self, coordinator: AnkerSolixCoordinator, entry: ConfigEntry, name: str, key: str, unit: str, gain: int):
+    """Register value divided by its REGISTER_GAINS entry (scaled once per refresh by the coordinator)."""
+
+    def __init__(self, coordinator: AnkerSolixCoordinator, entry: ConfigEntry, name: str, key: str, unit: str):
         super().__init__(coordinator, entry)
         self._attr_name = name
         self._key = key
         self._attr_native_unit_of_measurement = unit
-        self._gain = gain
 
     @property
     def unique_id(self):
@@ -147,10 +188,36 @@ class ScaledU16Sensor(_Base):
 
     @property
     def native_value(self):
-        raw = self.coordinator.data.get(self._key)
-        if raw is None:
-            return None
-        return float(int(raw)) / float(self._gain)
+        return self.coordinator.values.get(self._key)
+
+
+class DerivedSensor(_Base):
+    """Metric the coordinator derives from several registers (see DERIVED_SOURCES)."""
+
+    _attr_state_class = "measurement"
+
+    def __init__(
+        self,
+        coordinator: AnkerSolixCoordinator,
+        entry: ConfigEntry,
+        name: str,
+        key: str,
+        unit: str | None,
+        device_class: str | None,
+    ):
+        super().__init__(coordinator, entry)
+        self._attr_name = name
+        self._key = key
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+
+    @property
+    def unique_id(self):
+        return f"{self.entry.entry_id}_{self._key}"
+
+    @property
+    def native_value(self):
+        return self.coordinator.values.get(self._key)
 
 
 class EnumSensor(_Base):
@@ -171,3 +238,94 @@ class EnumSensor(_Base):
             return None
         raw = int(raw)
         return self._map.get(raw, f"unknown_{raw}")
+
+
+class PollLagSensor(_Base):
+    """How late the fleet scheduler started this charger's last refresh."""
+
+    _attr_name = "Poll Lag"
+    _attr_native_unit_of_measurement = "s"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = "measurement"
+
+    @property
+    def unique_id(self):
+        return f"{self.entry.entry_id}_poll_lag"
+
+    @property
+    def native_value(self):
+        lag = self.coordinator.poll_lag
+        return round(lag, 3) if lag is not None else None
+
+
+class RoundTripSensor(_Base):
+    """Mean Modbus round-trip time since startup, all function codes.
+
+    The per-function-code histograms are in the diagnostics download; as
+    attributes they would be recorded again on every refresh.
+    """
+
+    _attr_name = "Modbus Round Trip"
+    _attr_native_unit_of_measurement = "ms"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = "measurement"
+
+    @property
+    def unique_id(self):
+        return f"{self.entry.entry_id}_modbus_rtt"
+
+    @property
+    def native_value(self):
+        rtt = self.coordinator.client.stats.mean_rtt_s
+        return round(1000 * rtt, 1) if rtt is not None else None
+
+
+class TransportCounterSensor(_Base):
+    """Counter of the TCP connection, shared by every entry pooled on it."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = "total_increasing"
+
+    def __init__(self, coordinator: AnkerSolixCoordinator, entry: ConfigEntry, name: str, counter: str):
+        super().__init__(coordinator, entry)
+        self._attr_name = name
+        self._counter = counter
+
+    @property
+    def unique_id(self):
+        return f"{self.entry.entry_id}_modbus_{self._counter}"
+
+    @property
+    def native_value(self):
+        return getattr(self.coordinator.client.stats, self._counter)
+
+
+class UnitCounterSensor(TransportCounterSensor):
+    """Counter of the exchanges addressed to this entry's unit ID only."""
+
+    @property
+    def native_value(self):
+        return getattr(self.coordinator.client.unit_stats, self._counter)
+
+
+class CacheHitRatioSensor(_Base):
+    """Share of register reads answered by the cache or a shared in-flight read."""
+
+    _attr_name = "Modbus Cache Hit Ratio"
+    _attr_native_unit_of_measurement = "%"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = "measurement"
+
+    @property
+    def unique_id(self):
+        return f"{self.entry.entry_id}_modbus_cache_hit_ratio"
+
+    @property
+    def native_value(self):
+        ratio = self.coordinator.client.cache.as_dict()["hit_ratio"]
+        return round(100 * ratio, 1) if ratio is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        counters = self.coordinator.client.cache.as_dict()
+        return {k: counters[k] for k in ("hits", "misses", "coalesced")}
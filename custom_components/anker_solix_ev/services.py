@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import BinaryIO, TextIO
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import (
+    DOMAIN,
+    CAPTURE_DEFAULT_DURATION_S,
+    CAPTURE_MAX_DURATION_S,
+    DUMP_DEFAULT_RANGES,
+    DUMP_FORMATS,
+    SERVICE_CAPTURE_TRAFFIC,
+    SERVICE_DUMP_REGISTERS,
+)
+from .coordinator import AnkerSolixCoordinator
+from .dump import Row, format_rows, parse_ranges, scan_registers
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_RANGES = "ranges"
+ATTR_FORMAT = "format"
+ATTR_FILENAME = "filename"
+ATTR_DURATION = "duration"
+
+DUMP_REGISTERS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_RANGES, default=DUMP_DEFAULT_RANGES): cv.string,
+        vol.Optional(ATTR_FORMAT, default=DUMP_FORMATS[0]): vol.In(DUMP_FORMATS),
+        vol.Optional(ATTR_FILENAME): cv.string,
+    }
+)
+
+CAPTURE_TRAFFIC_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_DURATION, default=CAPTURE_DEFAULT_DURATION_S): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=CAPTURE_MAX_DURATION_S)
+        ),
+        vol.Optional(ATTR_FILENAME): cv.string,
+    }
+)
+
+
+def _coordinator(hass: HomeAssistant, entry_id: str | None) -> AnkerSolixCoordinator:
+    coordinators = {
+        key: value for key, value in hass.data.get(DOMAIN, {}).items() if isinstance(value, AnkerSolixCoordinator)
+    }
+    if entry_id is None and len(coordinators) == 1:
+        return next(iter(coordinators.values()))
+    if entry_id is None:
+        raise ServiceValidationError(f"{ATTR_CONFIG_ENTRY_ID} is required when several chargers are set up")
+    if entry_id not in coordinators:
+        raise ServiceValidationError(f"No loaded charger with config entry {entry_id}")
+    return coordinators[entry_id]
+
+
+def _output_path(hass: HomeAssistant, filename: str, extension: str) -> str:
+    """Path of a new service output file in `<config>/anker_solix_ev/`.
+
+    Outputs never land next to configuration.yaml or secrets.yaml, always
+    carry their format's extension and never replace an existing file.
+    """
+    if os.path.basename(filename) != filename or filename in ("", ".", ".."):
+        raise ServiceValidationError(f"{ATTR_FILENAME} must be a plain file name: {filename}")
+    if not filename.endswith(extension):
+        raise ServiceValidationError(f"{ATTR_FILENAME} must end in {extension}: {filename}")
+    return os.path.join(hass.config.path(DOMAIN), filename)
+
+
+def _create_file(path: str, mode: str) -> BinaryIO | TextIO:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    encoding = None if "b" in mode else "utf-8"
+    return open(path, mode, 1 if encoding else -1, encoding)
+
+
+async def _async_create_file(hass: HomeAssistant, path: str, mode: str) -> BinaryIO | TextIO:
+    try:
+        return await hass.async_add_executor_job(_create_file, path, mode)
+    except FileExistsError as err:
+        raise ServiceValidationError(f"{path} already exists") from err
+
+
+async def _async_dump_registers(call: ServiceCall) -> ServiceResponse:
+    hass = call.hass
+    coordinator = _coordinator(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+    try:
+        ranges = parse_ranges(call.data[ATTR_RANGES])
+    except ValueError as err:
+        raise ServiceValidationError(str(err)) from err
+    fmt = call.data[ATTR_FORMAT]
+    filename = call.data.get(ATTR_FILENAME) or (
+        f"{DOMAIN}_dump_{coordinator.entry.entry_id}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}"
+    )
+    path = _output_path(hass, filename, f".{fmt}")
+
+    handle = await _async_create_file(hass, path, "x")
+    header = fmt == "csv"
+
+    async def emit(rows: list[Row]) -> None:
+        # Rows are written chunk by chunk, so a long scan shows up in the file as it runs.
+        nonlocal header
+        text = format_rows(rows, fmt, header)
+        header = False
+        await hass.async_add_executor_job(handle.write, text)
+
+    try:
+        result = await scan_registers(coordinator.client, ranges, emit)
+    finally:
+        await hass.async_add_executor_job(handle.close)
+    _LOGGER.info(
+        "Dumped %s registers to %s (%s holes, %s errors, %s requests)",
+        result.registers, path, result.holes, result.errors, result.requests,
+    )
+    return {
+        "path": path,
+        "registers": result.registers,
+        "holes": result.holes,
+        "errors": result.errors,
+        "requests": result.requests,
+    }
+
+
+async def _async_capture_traffic(call: ServiceCall) -> ServiceResponse:
+    hass = call.hass
+    coordinator = _coordinator(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+    client = coordinator.client
+    if client.capturing:
+        raise ServiceValidationError("A capture is already running on this connection")
+    duration = call.data[ATTR_DURATION]
+    filename = call.data.get(ATTR_FILENAME) or (
+        f"{DOMAIN}_capture_{coordinator.entry.entry_id}_{datetime.now():%Y%m%d_%H%M%S}.bin"
+    )
+    path = _output_path(hass, filename, ".bin")
+    # Created here so an existing file is refused; the capture appends to it.
+    handle = await _async_create_file(hass, path, "xb")
+    await hass.async_add_executor_job(handle.close)
+    client.start_capture(path)
+
+    async def stop_later() -> None:
+        await asyncio.sleep(duration)
+        records = await client.stop_capture()
+        _LOGGER.info("Modbus capture %s finished: %s records", path, records)
+
+    # Tied to the entry: unloading closes the client, which ends the capture too.
+    coordinator.entry.async_create_background_task(hass, stop_later(), f"{DOMAIN} capture {path}")
+    return {"path": path, "duration": duration}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    if hass.services.has_service(DOMAIN, SERVICE_DUMP_REGISTERS):
+        return
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_REGISTERS,
+        _async_dump_registers,
+        schema=DUMP_REGISTERS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CAPTURE_TRAFFIC,
+        _async_capture_traffic,
+        schema=CAPTURE_TRAFFIC_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
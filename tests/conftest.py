@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# The integration package imports Home Assistant; tests load its HA-free
+# modules the same way the development tools do.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine on a fresh event loop, failing it if it hangs."""
+
+    def _run(coro, timeout: float = 10.0):
+        return asyncio.run(asyncio.wait_for(coro, timeout))
+
+    return _run
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from _integration import load
+
+cache_mod = load("cache")
+
+
+def _words(*values: int) -> bytes:
+    return b"".join(v.to_bytes(2, "big") for v in values)
+
+
+def test_joined_read_gets_its_slice_of_the_in_flight_fetch(run):
+    async def scenario():
+        cache = cache_mod.RegisterCache(default_ttl=5.0)
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return _words(10, 11, 12, 13)
+
+        wide = asyncio.ensure_future(cache.read(100, 4, fetch))
+        await asyncio.sleep(0)
+        narrow = asyncio.ensure_future(cache.read(101, 2, fetch))
+        await asyncio.sleep(0)
+        release.set()
+        assert await wide == _words(10, 11, 12, 13)
+        assert bytes(await narrow) == _words(11, 12)
+        assert len(calls) == 1
+        assert (cache.misses, cache.coalesced) == (1, 1)
+
+    run(scenario())
+
+
+def test_write_during_fetch_keeps_the_old_value_out(run):
+    async def scenario():
+        cache = cache_mod.RegisterCache(default_ttl=5.0)
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return _words(320)
+
+        read = asyncio.ensure_future(cache.read(21001, 1, fetch))
+        await asyncio.sleep(0)
+        cache.invalidate(21001)  # a write lands while the read is on the wire
+        release.set()
+        assert await read == _words(320)
+
+        async def refetch():
+            return _words(160)
+
+        assert await cache.read(21001, 1, refetch) == _words(160)
+        assert cache.misses == 2
+
+    run(scenario())
+
+
+def test_ttl_and_max_age_decide_cache_hits(run):
+    async def scenario():
+        cache = cache_mod.RegisterCache({1: 10.0}, default_ttl=0.0)
+        now = time.monotonic()
+        cache.put(1, _words(7), now - 5)
+        cache.put(2, _words(8), now - 5)
+
+        async def fetch():
+            return _words(9)
+
+        assert await cache.read(1, 1, fetch) == _words(7)  # within its own TTL
+        assert await cache.read(2, 1, fetch) == _words(9)  # default TTL 0: never cached
+        assert await cache.read(1, 1, fetch, max_age=1.0) == _words(9)
+        assert await cache.read(1, 2, fetch, max_age=0) == _words(9)
+        assert (cache.hits, cache.misses) == (1, 3)
+
+    run(scenario())
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import pytest
+
+from _integration import load
+
+codec = load("codec")
+
+
+def _frame(tid: int, pdu: bytes, unit: int = 1, pid: int = 0, length: int | None = None) -> bytes:
+    length = 1 + len(pdu) if length is None else length
+    return (
+        tid.to_bytes(2, "big") + pid.to_bytes(2, "big") + length.to_bytes(2, "big") + bytes((unit,)) + pdu
+    )
+
+
+READ_RESPONSE = b"\x03\x04\x00\x02\x01\x40"
+
+
+def test_encoder_patches_tid_into_cached_template():
+    encoder = codec.FrameEncoder()
+    pdu = codec.read_request(0x03, 21000, 2)
+    assert encoder.encode(1, 1, pdu) == _frame(1, pdu)
+    assert encoder.encode(0xBEEF, 1, pdu) == _frame(0xBEEF, pdu)
+    assert encoder.encode(2, 7, pdu) == _frame(2, pdu, unit=7)
+
+
+def test_encoder_rejects_oversized_pdu():
+    with pytest.raises(ValueError):
+        codec.FrameEncoder().encode(1, 1, bytes(codec.MAX_PDU_LEN + 1))
+
+
+def test_decoder_joins_a_frame_split_across_reads():
+    decoder = codec.FrameDecoder()
+    frame = _frame(5, READ_RESPONSE)
+    assert decoder.feed(frame[:3]) == []
+    assert decoder.feed(frame[3:9]) == []
+    assert decoder.feed(frame[9:]) == [(5, 1, READ_RESPONSE)]
+
+
+def test_decoder_returns_every_frame_of_one_read():
+    decoder = codec.FrameDecoder()
+    second = _frame(2, b"\x06\x52\x09\x00\xa0", unit=3)
+    data = _frame(1, READ_RESPONSE) + second + _frame(3, b"\x83\x02")[:4]
+    assert decoder.feed(data) == [(1, 1, READ_RESPONSE), (2, 3, b"\x06\x52\x09\x00\xa0")]
+    assert decoder.feed(_frame(3, b"\x83\x02")[4:]) == [(3, 1, b"\x83\x02")]
+
+
+def test_decoder_compacts_its_buffer_for_long_streams():
+    decoder = codec.FrameDecoder(size=512)
+    frame = _frame(9, READ_RESPONSE)
+    assert decoder.feed(frame[:6]) == []
+    for _ in range(200):
+        # Every read ends inside the next frame, so the buffer never drains
+        # and the partial frame has to be moved to the front.
+        assert decoder.feed(frame[6:] + frame[:6]) == [(9, 1, READ_RESPONSE)]
+
+
+def test_decoder_rejects_foreign_protocol_id():
+    with pytest.raises(codec.FrameError, match="PID"):
+        codec.FrameDecoder().feed(_frame(1, READ_RESPONSE, pid=1))
+
+
+@pytest.mark.parametrize("length", [0, 1, codec.MAX_PDU_LEN + 2])
+def test_decoder_rejects_impossible_length(length):
+    with pytest.raises(codec.FrameError, match="length"):
+        codec.FrameDecoder().feed(_frame(1, b"", length=length))
+
+
+def test_read_payload_returns_register_bytes():
+    assert bytes(codec.read_payload(0x03, READ_RESPONSE)) == b"\x00\x02\x01\x40"
+    assert codec.words(codec.read_payload(0x03, READ_RESPONSE)) == [2, 320]
+
+
+@pytest.mark.parametrize(
+    "pdu, error",
+    [
+        (b"\x83\x02", codec.ModbusException),
+        (b"\x04\x02\x00\x01", RuntimeError),  # wrong function code
+        (b"\x03\x04\x00\x01", RuntimeError),  # byte count mismatch
+        (b"\x03\x03\x00\x01\x02", RuntimeError),  # odd byte count
+        (b"\x03", RuntimeError),
+    ],
+)
+def test_read_payload_rejects_bad_responses(pdu, error):
+    with pytest.raises(error):
+        codec.read_payload(0x03, pdu)
+
+
+def test_exception_response_carries_code():
+    with pytest.raises(codec.ModbusException) as err:
+        codec.raise_if_exception(b"\x90\x02")
+    assert (err.value.fc, err.value.code) == (0x90, 2)
+
+
+def test_write_echo_is_checked():
+    codec.check_write_echo(codec.write_single_request(21001, 160), 0x06, 21001, 160)
+    codec.check_write_echo(codec.write_multiple_request(21001, [1, 2])[:5], 0x10, 21001, 2)
+    with pytest.raises(RuntimeError, match="echo mismatch"):
+        codec.check_write_echo(codec.write_single_request(21001, 100), 0x06, 21001, 160)
+    with pytest.raises(RuntimeError):
+        codec.check_write_echo(b"\x06\x52\x09", 0x06, 21001, 160)
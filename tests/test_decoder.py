@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import struct
+
+import pytest
+
+from _integration import load
+
+planner = load("planner")
+decoder = load("decoder")
+
+MAP = {"status": (10, "u16"), "power": (11, "s32"), "energy": (14, "u32"), "temp": (16, "s16")}
+BLOCK = planner.ReadBlock(10, 7, ("status", "power", "energy", "temp"))
+
+
+def _payload(power: tuple[int, int], energy: tuple[int, int]) -> bytes:
+    # status, power (2 words), one unused word, energy (2 words), temp
+    return struct.pack(">HHHHHHh", 2, *power, 0xFFFF, *energy, -5)
+
+
+def test_hi_lo_decodes_signed_and_unsigned_fields():
+    dec = decoder.BlockDecoder(BLOCK, MAP)
+    assert dec.decode(_payload((0xFFFF, 0xFF9C), (0x0001, 0x0000))) == {
+        "status": 2, "power": -100, "energy": 65536, "temp": -5,
+    }
+
+
+def test_lo_hi_recombines_words_and_keeps_the_sign():
+    dec = decoder.BlockDecoder(BLOCK, MAP, word_order="lo_hi")
+    assert dec.decode(_payload((0xFF9C, 0xFFFF), (0x0000, 0x0001))) == {
+        "status": 2, "power": -100, "energy": 65536, "temp": -5,
+    }
+    assert dec.decode(_payload((0xFFFF, 0x7FFF), (0xFFFF, 0xFFFF)))["power"] == 0x7FFFFFFF
+    assert dec.decode(_payload((0x0000, 0x8000), (0xFFFF, 0xFFFF)))["energy"] == 0xFFFFFFFF
+    assert dec.decode(_payload((0x0000, 0x8000), (0, 0)))["power"] == -0x80000000
+
+
+def test_short_payload_is_rejected():
+    with pytest.raises(RuntimeError, match="Short block payload"):
+        decoder.BlockDecoder(BLOCK, MAP).decode(bytes(12))
+
+
+def test_overlapping_registers_are_rejected():
+    with pytest.raises(ValueError, match="Overlapping"):
+        decoder.BlockDecoder(planner.ReadBlock(10, 3, ("power", "x")), {**MAP, "x": (12, "u16")})
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+from _integration import load
+
+derived = load("derived")
+
+THREE_PHASE = 3
+
+
+def _phases(*currents: int, mode: int = THREE_PHASE) -> dict:
+    data = {"operating_mode": mode}
+    data.update({f"i_l{n}": raw for n, raw in enumerate(currents, 1)})
+    return data
+
+
+def test_imbalance_is_largest_deviation_from_the_mean():
+    values = derived.derive_values(_phases(1000, 1000, 700))  # 10 A, 10 A, 7 A
+    assert values["i_total"] == 27.0
+    assert values["current_imbalance"] == pytest.approx(22.2)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        _phases(1000, 1000, 700, mode=1),  # not charging on three phases
+        _phases(1000, 1000),  # a phase current was not read
+        {"i_l1": 1000, "i_l2": 1000, "i_l3": 700},  # operating mode unknown
+    ],
+)
+def test_imbalance_is_none_without_three_phase_currents(data):
+    assert derived.derive_values(data)["current_imbalance"] is None
+
+
+def test_imbalance_is_zero_without_load():
+    assert derived.derive_values(_phases(0, 0, 0))["current_imbalance"] == 0.0
+
+
+@pytest.mark.parametrize(
+    "p, s, pf",
+    [
+        (900, 1000, 0.9),
+        (1010, 1000, 1.0),  # rounding in the meter must not push PF above 1
+        (0, 0, None),  # no load
+        (500, None, None),
+        (None, 1000, None),
+    ],
+)
+def test_power_factor(p, s, pf):
+    data = {k: v for k, v in (("p_l1", p), ("s_l1", s)) if v is not None}
+    values = derived.derive_values(data)
+    assert values["pf_l1"] == pf
+    assert values["pf_l2"] is None
+
+
+def test_missing_sources_give_none_totals():
+    values = derived.derive_values({})
+    assert values["i_total"] is None and values["q_total"] is None
@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import asyncio
+
+from _integration import load
+from modbus_simulator import ChargerSimulator, SimulatorConfig
+
+const = load("const")
+mc = load("modbus_client")
+
+
+def _client(port: int, **kwargs) -> mc.AnkerModbusClient:
+    return mc.AnkerModbusClient(mc.ModbusSettings(host="127.0.0.1", port=port, **kwargs))
+
+
+def test_write_queued_during_flush_is_sent(run):
+    async def scenario():
+        sim = ChargerSimulator(SimulatorConfig(latency_s=0.2))
+        client = _client(await sim.start(), write_debounce_s=0.05, write_max_delay_s=0.1)
+        try:
+            first = asyncio.create_task(client.queue_write(const.REG_MAX_CURRENT, 100))
+            # Wait until the first flush is on the wire, then queue a newer value.
+            while sim.function_counts.get(0x06, 0) == 0:
+                await asyncio.sleep(0.01)
+            await asyncio.wait_for(client.queue_write(const.REG_MAX_CURRENT, 160), 3.0)
+            await first
+            assert sim.registers[const.REG_MAX_CURRENT] == 160
+            assert client._write_queue == {}
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_queued_writes_merge_and_skip_known_values(run):
+    async def scenario():
+        sim = ChargerSimulator()
+        client = _client(await sim.start(), write_debounce_s=0.05)
+        try:
+            client.note_values({const.REG_PHASE_SETTING: 1})
+            await asyncio.gather(
+                client.queue_write(const.REG_PHASE_SETTING, 1),  # already on the device
+                client.queue_write(const.REG_MAX_CURRENT, 100),
+                client.queue_write(const.REG_MAX_CURRENT, 120),
+            )
+            assert sim.registers[const.REG_MAX_CURRENT] == 120
+            assert sim.function_counts.get(0x06, 0) + sim.function_counts.get(0x10, 0) == 1
+            assert client.write_generation == 1  # one read-back for all three callers
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def _breaker_client(port: int, **kwargs) -> mc.AnkerModbusClient:
+    return _client(
+        port,
+        retries=0,
+        response_timeout=0.1,
+        min_response_timeout=0.05,
+        max_response_timeout=0.1,
+        breaker_threshold=1,
+        breaker_cooldown_s=0.1,
+        **kwargs,
+    )
+
+
+async def _trip_breaker(sim: ChargerSimulator, client: mc.AnkerModbusClient) -> None:
+    sim.config.latency_s = 0.5
+    try:
+        await client.read_u16(const.REG_CHARGING_STATUS)
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("slow read did not time out")
+    try:
+        await client.read_u16(const.REG_CHARGING_STATUS)
+    except mc.CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("breaker did not open")
+    await asyncio.sleep(0.15)  # cooldown over: the next call is the half-open probe
+
+
+def test_breaker_recovers_after_probe_runs_out_of_deadline(run):
+    async def scenario():
+        sim = ChargerSimulator()
+        client = _breaker_client(await sim.start())
+        try:
+            await _trip_breaker(sim, client)
+            try:
+                await client.read_u16(const.REG_CHARGING_STATUS, deadline=mc.Deadline(0.05), max_age=0)
+            except mc.DeadlineExceeded:
+                pass
+            else:
+                raise AssertionError("probe did not run out of its deadline")
+            sim.config.latency_s = 0.0
+            assert await client.read_u16(const.REG_CHARGING_STATUS, max_age=0) == 2
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_breaker_recovers_after_probe_is_cancelled(run):
+    async def scenario():
+        sim = ChargerSimulator()
+        client = _breaker_client(await sim.start())
+        try:
+            await _trip_breaker(sim, client)
+            # Uncached: a cache read would keep the exchange running for other waiters.
+            probe = asyncio.create_task(client.read_block_uncached(const.REG_CHARGING_STATUS, 1))
+            await asyncio.sleep(0.02)
+            probe.cancel()
+            await asyncio.gather(probe, return_exceptions=True)
+            sim.config.latency_s = 0.0
+            await asyncio.sleep(0.6)  # the cancelled request's late answer drains first
+            assert await client.read_u16(const.REG_CHARGING_STATUS, max_age=0) == 2
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_monitor_reconnects_a_dropped_idle_connection(run):
+    async def scenario():
+        sim = ChargerSimulator()
+        client = _client(await sim.start(), monitor_interval_s=0.02)
+        try:
+            await client.read_u16(const.REG_CHARGING_STATUS)
+            await client._t._close_socket()  # as if the charger had dropped it
+            await asyncio.sleep(0.2)
+            assert client._t._proto is not None
+            assert client.stats.reconnects == 1
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_monitor_does_not_reconnect_while_breaker_is_open(run):
+    async def scenario():
+        sim = ChargerSimulator()
+        client = _breaker_client(await sim.start(), monitor_interval_s=0.02)
+        try:
+            await _trip_breaker(sim, client)  # the timeout also dropped the socket
+            connects = client.stats.connects
+            await asyncio.sleep(0.3)
+            assert client.stats.connects == connects
+            assert client._t._proto is None
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_silent_unit_does_not_fail_its_neighbours(run):
+    async def scenario():
+        sim = ChargerSimulator(SimulatorConfig(silent_units={2}))
+        port = await sim.start()
+        pool = mc.ConnectionPool()
+        settings = dict(
+            host="127.0.0.1",
+            port=port,
+            retries=0,
+            response_timeout=0.1,
+            min_response_timeout=0.05,
+            max_response_timeout=0.1,
+            breaker_threshold=1,
+        )
+        good = mc.AnkerModbusClient(mc.ModbusSettings(unit_id=1, **settings), pool=pool)
+        dead = mc.AnkerModbusClient(mc.ModbusSettings(unit_id=2, **settings), pool=pool)
+        try:
+            assert await good.read_u16(const.REG_CHARGING_STATUS) == 2
+            try:
+                await dead.read_u16(const.REG_CHARGING_STATUS)
+            except TimeoutError:
+                pass
+            else:
+                raise AssertionError("silent unit answered")
+            try:
+                await dead.read_u16(const.REG_CHARGING_STATUS)
+            except mc.CircuitOpenError:
+                pass
+            else:
+                raise AssertionError("breaker did not open for the silent unit")
+            # Unit 1 keeps its breaker closed and the shared socket stays up.
+            assert await good.read_u16(const.REG_CHARGING_STATUS, max_age=0) == 2
+            assert good.stats.reconnects == 0
+            # The shared connection saw the timeout, but only the silent unit counts it.
+            assert good.stats.timeouts == 1
+            assert (good.unit_stats.timeouts, good.unit_stats.fast_failures) == (0, 0)
+            assert (dead.unit_stats.timeouts, dead.unit_stats.fast_failures) == (1, 1)
+            assert good.stats.as_dict()["units"]["2"]["breaker_trips"] == 1
+        finally:
+            await good.close()
+            await dead.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_priority_gate_serves_most_urgent_waiter_first(run):
+    async def scenario():
+        gate = mc.PriorityGate(1)
+        await gate.acquire()
+        order = []
+
+        async def waiter(name, priority):
+            await gate.acquire(priority)
+            order.append(name)
+            gate.release()
+
+        tasks = [
+            asyncio.create_task(waiter(name, priority))
+            for name, priority in [
+                ("poll-1", mc.PRIORITY_POLL), ("user", mc.PRIORITY_USER),
+                ("poll-2", mc.PRIORITY_POLL), ("control", mc.PRIORITY_CONTROL),
+            ]
+        ]
+        await asyncio.sleep(0)
+        gate.release()
+        await asyncio.gather(*tasks)
+        assert order == ["control", "user", "poll-1", "poll-2"]
+
+    run(scenario())
+
+
+def test_priority_gate_skips_cancelled_waiters(run):
+    async def scenario():
+        gate = mc.PriorityGate(1)
+        await gate.acquire()
+        cancelled = asyncio.create_task(gate.acquire(mc.PRIORITY_CONTROL))
+        waiting = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        gate.release()
+        await asyncio.wait_for(waiting, 1.0)
+        assert gate.locked()
+
+    run(scenario())
+
+
+async def _finish_order(tasks: dict) -> list:
+    order = []
+    for name, task in tasks.items():
+        task.add_done_callback(lambda _t, name=name: order.append(name))
+    await asyncio.gather(*tasks.values())
+    return order
+
+
+def test_control_write_overtakes_queued_polls(run):
+    async def scenario():
+        sim = ChargerSimulator(SimulatorConfig(latency_s=0.05))
+        client = _client(await sim.start())
+        try:
+            tasks = {
+                f"poll-{i}": asyncio.create_task(client.read_block_uncached(const.REG_CHARGING_STATUS, 1))
+                for i in range(4)
+            }
+            await asyncio.sleep(0.01)  # poll-0 on the wire, the rest queued
+            tasks["write"] = asyncio.create_task(client.write_u16(const.REG_MAX_CURRENT, 160))
+            order = await _finish_order(tasks)
+            assert order[:2] == ["poll-0", "write"]
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_fleet_limiter_lets_a_write_past_another_chargers_polls(run):
+    async def scenario():
+        busy_sim = ChargerSimulator(SimulatorConfig(latency_s=0.05))
+        other_sim = ChargerSimulator()
+        limiter = mc.PriorityGate(1)
+        busy = mc.AnkerModbusClient(
+            mc.ModbusSettings(host="127.0.0.1", port=await busy_sim.start()), limiter=limiter
+        )
+        other = mc.AnkerModbusClient(
+            mc.ModbusSettings(host="127.0.0.1", port=await other_sim.start()), limiter=limiter
+        )
+        try:
+            tasks = {
+                f"poll-{i}": asyncio.create_task(busy.read_block_uncached(const.REG_CHARGING_STATUS, 1))
+                for i in range(4)
+            }
+            await asyncio.sleep(0.01)
+            tasks["write"] = asyncio.create_task(other.write_u16(const.REG_MAX_CURRENT, 160))
+            order = await _finish_order(tasks)
+            # Only the busy charger's in-flight poll holds the fleet slot.
+            assert order[:2] == ["poll-0", "write"]
+            assert other_sim.registers[const.REG_MAX_CURRENT] == 160
+        finally:
+            await busy.close()
+            await other.close()
+            await busy_sim.stop()
+            await other_sim.stop()
+
+    run(scenario())
+
+
+def test_monitor_leaves_a_dropped_connection_closed_with_idle_close(run):
+    async def scenario():
+        sim = ChargerSimulator()
+        client = _client(await sim.start(), monitor_interval_s=0.02, idle_close_s=30.0)
+        try:
+            await client.read_u16(const.REG_CHARGING_STATUS)
+            await client._t._close_socket()  # the charger's own idle timeout
+            await asyncio.sleep(0.2)
+            assert client._t._proto is None
+            assert client.stats.connects == 1
+            assert await client.read_u16(const.REG_CHARGING_STATUS, max_age=0) == 2
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_pipelined_requests_overlap_on_the_simulator(run):
+    async def scenario():
+        sim = ChargerSimulator(SimulatorConfig(latency_s=0.1))
+        client = _client(await sim.start(), pipeline_depth=4)
+        try:
+            await client.read_u16(const.REG_CHARGING_STATUS)  # connect outside the timing
+            started = asyncio.get_running_loop().time()
+            await asyncio.gather(*(client.read_block_uncached(const.REG_CHARGING_STATUS, 1) for _ in range(4)))
+            assert asyncio.get_running_loop().time() - started < 0.3
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_slow_connect_comes_out_of_the_deadline(run):
+    async def scenario():
+        sim = ChargerSimulator(SimulatorConfig(latency_s=1.0))
+        client = _client(await sim.start(), retries=0)
+        transport = client._t
+        open_socket = transport._open
+
+        async def slow_open(deadline=None):
+            await asyncio.sleep(0.3)
+            return await open_socket(deadline)
+
+        transport._open = slow_open
+        try:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                await client.read_u16(const.REG_CHARGING_STATUS, deadline=mc.Deadline(0.5), max_age=0)
+            except mc.DeadlineExceeded:
+                pass
+            else:
+                raise AssertionError("read outlived its deadline")
+            assert loop.time() - started < 0.65
+        finally:
+            await client.close()
+            await sim.stop()
+
+    run(scenario())
+
+
+def test_close_fails_writes_of_a_flush_in_progress(run):
+    async def scenario():
+        sim = ChargerSimulator(SimulatorConfig(latency_s=0.5))
+        client = _client(await sim.start(), write_debounce_s=0.0)
+        try:
+            write = asyncio.create_task(client.queue_write(const.REG_MAX_CURRENT, 100))
+            while sim.function_counts.get(0x06, 0) == 0:
+                await asyncio.sleep(0.01)
+        finally:
+            await client.close()
+            await sim.stop()
+        try:
+            await asyncio.wait_for(write, 1.0)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("write succeeded after close")
+
+    run(scenario())
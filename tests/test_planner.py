@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from _integration import load
+
+planner = load("planner")
+
+MAP = {
+    "a": (100, "u16"),
+    "b": (101, "u32"),
+    "c": (105, "u16"),  # 2 unused words after b
+    "d": (120, "s16"),  # 14 unused words after c
+}
+
+
+def test_plan_reads_merges_keys_across_small_gaps():
+    blocks = planner.plan_reads(register_map=MAP, max_gap=2)
+    assert blocks == [planner.ReadBlock(100, 6, ("a", "b", "c")), planner.ReadBlock(120, 1, ("d",))]
+
+
+def test_plan_reads_splits_on_gap_limit():
+    blocks = planner.plan_reads(register_map=MAP, max_gap=1)
+    assert [(b.start, b.quantity) for b in blocks] == [(100, 3), (105, 1), (120, 1)]
+
+
+def test_plan_reads_splits_on_quantity_limit():
+    blocks = planner.plan_reads(register_map=MAP, max_gap=20, max_quantity=6)
+    assert [(b.start, b.quantity) for b in blocks] == [(100, 6), (120, 1)]
+    # A 32-bit key is never cut in half at the quantity limit.
+    blocks = planner.plan_reads(register_map=MAP, max_gap=20, max_quantity=2)
+    assert [(b.start, b.quantity) for b in blocks] == [(100, 1), (101, 2), (105, 1), (120, 1)]
+
+
+def test_plan_reads_only_covers_requested_keys():
+    blocks = planner.plan_reads(["d", "a"], register_map=MAP, max_gap=30)
+    assert blocks == [planner.ReadBlock(100, 21, ("a", "d"))]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import pytest
+
+from _integration import load
+from modbus_simulator import ChargerSimulator, SimulatorConfig
+
+const = load("const")
+probe = load("probe")
+
+
+@pytest.mark.parametrize("max_in_flight", [0, 1])
+def test_detect_layout_finds_the_offset(run, max_in_flight):
+    async def scenario():
+        sim = ChargerSimulator(SimulatorConfig(address_offset=-1, max_in_flight=max_in_flight))
+        try:
+            result = await probe.detect_layout("127.0.0.1", await sim.start())
+        finally:
+            await sim.stop()
+        assert result is not None
+        assert (result.address_offset, result.word_order) == (-1, "hi_lo")
+        assert set(result.data) == set(const.REGISTER_MAP)  # every block answered
+
+    run(scenario(), timeout=20.0)
+
+
+def test_session_counters_decide_word_order_on_an_idle_charger():
+    idle = {"power_w": 0, "p_l1": 0, "charging_status": 0}
+    hi_lo = probe.score({**idle, "duration_s": 1800, "energy_wh": 3680})
+    lo_hi = probe.score({**idle, "duration_s": 1800 << 16, "energy_wh": 3680 << 16})
+    assert hi_lo > lo_hi
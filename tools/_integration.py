@@ -0,0 +1,23 @@
+"""Import the integration's Home Assistant-free modules from a source checkout.
+
+The package `__init__` pulls in Home Assistant, so the tools register the
+integration directory as a bare namespace package and import only the
+modules that do not need it (const, planner, decoder, modbus_client).
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "anker_solix_ev"
+_PACKAGE = "anker_solix_ev_dev"
+
+
+def load(name: str) -> types.ModuleType:
+    if _PACKAGE not in sys.modules:
+        pkg = types.ModuleType(_PACKAGE)
+        pkg.__path__ = [str(PACKAGE_DIR)]
+        sys.modules[_PACKAGE] = pkg
+    return importlib.import_module(f"{_PACKAGE}.{name}")
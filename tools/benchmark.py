@@ -0,0 +1,213 @@
+"""End-to-end refresh benchmark against simulated chargers.
+
+For each fleet size N, starts N simulators and N clients and runs the
+coordinator's refresh path (tiered read plan -> block reads -> struct
+decode) a fixed number of times per charger. Reports refresh latency,
+round trips per refresh and exchanges per second.
+
+    python tools/benchmark.py --chargers 1 4 16 --refreshes 50 --latency 0.01
+    python tools/benchmark.py --mode per-key     # legacy one-read-per-key path
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+try:
+    from _integration import load
+    from modbus_simulator import ChargerSimulator, SimulatorConfig
+except ImportError:  # imported as tools.benchmark
+    from tools._integration import load
+    from tools.modbus_simulator import ChargerSimulator, SimulatorConfig
+
+const = load("const")
+planner = load("planner")
+decoder = load("decoder")
+modbus_client = load("modbus_client")
+
+
+DEFAULT_TIER_INTERVALS = {
+    const.TIER_FAST: float(const.DEFAULT_FAST_SCAN_INTERVAL),
+    const.TIER_NORMAL: float(const.DEFAULT_SCAN_INTERVAL),
+    const.TIER_SLOW: float(const.DEFAULT_SLOW_SCAN_INTERVAL),
+}
+
+
+class RefreshRunner:
+    """HA-free equivalent of AnkerSolixCoordinator._read_all_data for one charger.
+
+    Polls the keys of the entities enabled by default, tier by tier, with
+    the coordinator's planning. Each refresh is one polling tick on a
+    virtual clock, so the slow tier is read as often as it would be live.
+    """
+
+    def __init__(
+        self,
+        client,
+        mode: str,
+        word_order: str = "hi_lo",
+        tier_intervals: Dict[str, float] = DEFAULT_TIER_INTERVALS,
+    ):
+        self.client = client
+        self.mode = mode
+        self.word_order = word_order
+        self.tier_intervals = dict(tier_intervals)
+        self.keys = planner.polled_keys(
+            k for k in (*const.REGISTER_MAP, *const.DERIVED_SOURCES) if k not in const.DISABLED_BY_DEFAULT_KEYS
+        )
+        self.now = 0.0
+        self._tier_last: Dict[str, float] = {}
+        self._plans: Dict[frozenset, list] = {}
+        self._decoders: Dict[object, object] = {}
+
+    def _due_tiers(self) -> frozenset:
+        slack = min(self.tier_intervals.values()) / 2
+        return frozenset(
+            tier
+            for tier, interval in self.tier_intervals.items()
+            if tier not in self._tier_last or self.now - self._tier_last[tier] >= interval - slack
+        )
+
+    async def _block(self, block) -> Dict[str, int]:
+        payload = await self.client.read_block_raw(block.start, block.quantity)
+        dec = self._decoders.get(block)
+        if dec is None:
+            dec = self._decoders[block] = decoder.BlockDecoder(block, const.REGISTER_MAP, self.word_order)
+        return dec.decode(payload)
+
+    async def refresh(self) -> Dict[str, int]:
+        if self.mode == "per-key":
+            data: Dict[str, int] = {}
+            for key, (register, kind) in const.REGISTER_MAP.items():
+                if const.REGISTER_WIDTHS[kind] == 2:
+                    data[key] = await self.client.read_u32(register)
+                else:
+                    data[key] = await self.client.read_u16(register)
+            return data
+        tiers = self._due_tiers()
+        plan = self._plans.get(tiers)
+        if plan is None:
+            plan = self._plans[tiers] = planner.plan_tier_reads(self.keys, tiers)
+        data = {}
+        for part in await asyncio.gather(*(self._block(b) for b in plan)):
+            data.update(part)
+        for tier in tiers:
+            self._tier_last[tier] = self.now
+        self.now += min(self.tier_intervals.values())
+        return data
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_fleet(n: int, args: argparse.Namespace) -> Dict[str, float]:
+    sims = [
+        ChargerSimulator(
+            SimulatorConfig(
+                latency_s=args.latency,
+                jitter_s=args.jitter,
+                drop_rate=args.drop_rate,
+                tid_corrupt_rate=args.tid_corrupt_rate,
+                input_registers=args.input_registers,
+                seed=i,
+            )
+        )
+        for i in range(n)
+    ]
+    ports = [await sim.start() for sim in sims]
+    limiter = modbus_client.PriorityGate(args.max_concurrent) if args.max_concurrent else None
+    clients = [
+        modbus_client.AnkerModbusClient(
+            modbus_client.ModbusSettings(
+                host="127.0.0.1",
+                port=port,
+                connect_timeout=2.0,
+                response_timeout=args.timeout,
+                retries=1,
+                retry_delay_s=0.05,
+                pipeline_depth=args.pipeline,
+            ),
+            limiter=limiter,
+        )
+        for port in ports
+    ]
+    runners = [RefreshRunner(c, args.mode) for c in clients]
+
+    # Warm-up: connect sockets outside the measurement.
+    await asyncio.gather(*(r.refresh() for r in runners), return_exceptions=True)
+    for sim in sims:
+        sim.reset_counters()
+
+    latencies: List[float] = []
+    failures = 0
+
+    async def loop(runner: RefreshRunner) -> None:
+        nonlocal failures
+        for _ in range(args.refreshes):
+            t0 = time.perf_counter()
+            try:
+                await runner.refresh()
+            except Exception:
+                failures += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+
+    wall0 = time.perf_counter()
+    await asyncio.gather(*(loop(r) for r in runners))
+    wall = time.perf_counter() - wall0
+
+    for client in clients:
+        await client.close()
+    for sim in sims:
+        await sim.stop()
+
+    total_requests = sum(sim.requests for sim in sims)
+    refreshes = n * args.refreshes
+    return {
+        "chargers": n,
+        "refreshes": refreshes,
+        "failures": failures,
+        "mean_ms": 1000 * statistics.fmean(latencies) if latencies else float("nan"),
+        "p95_ms": 1000 * _pct(latencies, 0.95) if latencies else float("nan"),
+        "round_trips": total_requests / refreshes,
+        "exchanges_s": total_requests / wall if wall > 0 else float("nan"),
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    print(
+        f"mode={args.mode} pipeline={args.pipeline} latency={args.latency}s "
+        f"jitter={args.jitter}s max_concurrent={args.max_concurrent or 'unbounded'}"
+    )
+    print(f"{'chargers':>8} {'refresh':>8} {'fail':>5} {'mean ms':>9} {'p95 ms':>9} {'rt/refresh':>10} {'exch/s':>9}")
+    for n in args.chargers:
+        r = await run_fleet(n, args)
+        print(
+            f"{r['chargers']:>8} {r['refreshes']:>8} {r['failures']:>5} {r['mean_ms']:>9.2f} "
+            f"{r['p95_ms']:>9.2f} {r['round_trips']:>10.1f} {r['exchanges_s']:>9.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chargers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--refreshes", type=int, default=20, help="refreshes per charger")
+    parser.add_argument("--mode", choices=["planned", "per-key"], default="planned")
+    parser.add_argument("--pipeline", type=int, default=1, help="client pipeline_depth")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="fleet exchange limit (0 = none)")
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--tid-corrupt-rate", type=float, default=0.0)
+    parser.add_argument("--input-registers", action="store_true")
+    parser.add_argument("--timeout", type=float, default=2.0, help="client response timeout (s)")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Asyncio Modbus TCP server emulating an Anker SOLIX EV charger.
+
+Serves the register map from `const.py` with plausible values and supports
+the failure modes seen in the field:
+
+  - telemetry served as input registers only (FC03 -> exception 2, so the
+    client has to fall back to FC04),
+  - exception responses for unmapped addresses,
+  - response latency with jitter,
+  - dropped connections and corrupted transaction IDs,
+  - unit IDs that never answer, as a dead charger behind a gateway,
+  - lock-step firmware that ignores requests sent while one is in flight.
+
+Run standalone:  python tools/modbus_simulator.py --port 5020 --latency 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+try:
+    from _integration import load
+except ImportError:  # imported as tools.modbus_simulator
+    from tools._integration import load
+
+const = load("const")
+
+MBAP_HEADER_LEN = 7
+
+
+@dataclass
+class SimulatorConfig:
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    drop_rate: float = 0.0         # probability of closing the socket instead of answering
+    tid_corrupt_rate: float = 0.0  # probability of answering with a wrong transaction ID
+    input_registers: bool = False  # telemetry only readable with FC04
+    strict: bool = False           # unmapped addresses inside a read raise exception 2
+    address_offset: int = 0        # device address = documented register + offset
+    silent_units: Set[int] = field(default_factory=set)  # unit IDs whose requests go unanswered
+    max_in_flight: int = 0         # requests answered at once per connection; extras are ignored (0 = no limit)
+    seed: int | None = None
+
+
+def default_registers() -> Dict[int, int]:
+    """Register image of a charger charging at ~7.4 kW on one phase."""
+    regs: Dict[int, int] = {}
+
+    def put(key: str, value: int) -> None:
+        register, kind = const.REGISTER_MAP[key]
+        if const.REGISTER_WIDTHS[kind] == 2:
+            value &= 0xFFFFFFFF
+            regs[register] = value >> 16
+            regs[register + 1] = value & 0xFFFF
+        else:
+            regs[register] = value & 0xFFFF
+
+    values = {
+        "charging_status": 2, "power_w": 7360, "duration_s": 1800, "energy_wh": 3680,
+        "phase_setting": 1, "max_current": 320,
+        "v_l1n": 2301, "v_l2n": 0, "v_l3n": 0, "v_l12": 0, "v_l23": 0, "v_l31": 0,
+        "i_l1": 3200, "i_l2": 0, "i_l3": 0,
+        "p_l1": 7360, "p_l2": 0, "p_l3": 0,
+        "q_l1": -120, "q_l2": 0, "q_l3": 0,
+        "s_l1": 7361, "s_l2": 0, "s_l3": 0,
+        "operating_mode": 1, "pwm_enabled": 1, "charging_mode": 0,
+        "cp_signal_status": 1, "load_balancing_enabled": 0, "solar_balancing_enabled": 0,
+        "cp_acq_voltage": 5, "led_brightness": 80,
+        "relay1_temp": 41, "relay2_temp": 39,
+    }
+    for key in const.REGISTER_MAP:
+        put(key, values.get(key, 0))
+    # Control registers: write-only command/timeout slots still exist on the device.
+    regs.setdefault(const.REG_COMMAND, 0)
+    regs.setdefault(const.REG_TIMEOUT, 0)
+    return regs
+
+
+@dataclass
+class ChargerSimulator:
+    config: SimulatorConfig = field(default_factory=SimulatorConfig)
+    registers: Dict[int, int] = field(default_factory=default_registers)
+    requests: int = 0
+    function_counts: Dict[int, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.config.seed)
+        self._server: asyncio.base_events.Server | None = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.port: int | None = None
+        telemetry_top = max(r for r, _k in const.REGISTER_MAP.values()) + 2
+        self._input_range = range(20000, max(telemetry_top, 20100))
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+
+    def reset_counters(self) -> None:
+        self.requests = 0
+        self.function_counts.clear()
+
+    # ---- protocol -------------------------------------------------------
+
+    def _exception(self, fc: int, code: int) -> bytes:
+        return bytes([fc | 0x80, code])
+
+    def _read(self, fc: int, addr: int, qty: int) -> bytes:
+        if not 1 <= qty <= 125:
+            return self._exception(fc, 3)
+        start = addr - self.config.address_offset
+        words: List[int] = []
+        for register in range(start, start + qty):
+            is_input = register in self._input_range
+            if self.config.input_registers and fc == 0x03 and is_input:
+                return self._exception(fc, 2)
+            if register not in self.registers:
+                if self.config.strict:
+                    return self._exception(fc, 2)
+                words.append(0)
+                continue
+            words.append(self.registers[register])
+        payload = b"".join(w.to_bytes(2, "big") for w in words)
+        return bytes([fc, len(payload)]) + payload
+
+    def _write_single(self, addr: int, value: int) -> bytes:
+        register = addr - self.config.address_offset
+        if register not in self.registers:
+            return self._exception(0x06, 2)
+        self.registers[register] = value
+        return b"\x06" + addr.to_bytes(2, "big") + value.to_bytes(2, "big")
+
+    def _write_multiple(self, pdu: bytes) -> bytes:
+        addr = int.from_bytes(pdu[1:3], "big")
+        qty = int.from_bytes(pdu[3:5], "big")
+        if pdu[5] != 2 * qty or len(pdu) != 6 + 2 * qty:
+            return self._exception(0x10, 3)
+        start = addr - self.config.address_offset
+        if any(r not in self.registers for r in range(start, start + qty)):
+            return self._exception(0x10, 2)
+        for i in range(qty):
+            self.registers[start + i] = int.from_bytes(pdu[6 + 2 * i : 8 + 2 * i], "big")
+        return pdu[:5]
+
+    def handle_pdu(self, pdu: bytes) -> bytes:
+        fc = pdu[0]
+        self.requests += 1
+        self.function_counts[fc] = self.function_counts.get(fc, 0) + 1
+        if fc in (0x03, 0x04) and len(pdu) == 5:
+            return self._read(fc, int.from_bytes(pdu[1:3], "big"), int.from_bytes(pdu[3:5], "big"))
+        if fc == 0x06 and len(pdu) == 5:
+            return self._write_single(int.from_bytes(pdu[1:3], "big"), int.from_bytes(pdu[3:5], "big"))
+        if fc == 0x10 and len(pdu) >= 6:
+            return self._write_multiple(pdu)
+        return self._exception(fc, 1)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        in_flight: Set[asyncio.Task] = set()
+        try:
+            while True:
+                hdr = await reader.readexactly(MBAP_HEADER_LEN)
+                length = int.from_bytes(hdr[4:6], "big")
+                pdu = await reader.readexactly(length - 1)
+                if hdr[6] in self.config.silent_units:
+                    continue
+                if 0 < self.config.max_in_flight <= len(in_flight):
+                    continue
+                # Handled in arrival order, answered by a task of its own so
+                # pipelined requests overlap as they would on a real device.
+                answer = asyncio.create_task(self._answer(writer, hdr, self.handle_pdu(pdu)))
+                for tasks in (self._tasks, in_flight):
+                    tasks.add(answer)
+                    answer.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._tasks.discard(task)
+            writer.close()
+
+    async def _answer(self, writer: asyncio.StreamWriter, hdr: bytes, resp: bytes) -> None:
+        try:
+            delay = self.config.latency_s + self._rng.uniform(0.0, self.config.jitter_s)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if writer.is_closing():
+                return
+            if self._rng.random() < self.config.drop_rate:
+                writer.close()
+                return
+
+            tid = int.from_bytes(hdr[0:2], "big")
+            if self._rng.random() < self.config.tid_corrupt_rate:
+                tid = (tid + 1 + self._rng.randrange(0xFFFE)) & 0xFFFF
+            writer.write(tid.to_bytes(2, "big") + hdr[2:4] + (len(resp) + 1).to_bytes(2, "big") + hdr[6:7] + resp)
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+
+async def _main(args: argparse.Namespace) -> None:
+    sim = ChargerSimulator(
+        SimulatorConfig(
+            latency_s=args.latency,
+            jitter_s=args.jitter,
+            drop_rate=args.drop_rate,
+            tid_corrupt_rate=args.tid_corrupt_rate,
+            input_registers=args.input_registers,
+            strict=args.strict,
+            address_offset=args.address_offset,
+        )
+    )
+    port = await sim.start(args.host, args.port)
+    print(f"Anker SOLIX EV simulator listening on {args.host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await sim.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--latency", type=float, default=0.0, help="base response delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay up to this (s)")
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--tid-corrupt-rate", type=float, default=0.0)
+    parser.add_argument("--input-registers", action="store_true", help="telemetry only via FC04")
+    parser.add_argument("--strict", action="store_true", help="exception 2 for unmapped addresses")
+    parser.add_argument("--address-offset", type=int, default=0)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
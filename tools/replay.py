@@ -0,0 +1,89 @@
+"""Replay a Modbus traffic capture through the refresh path.
+
+Captures come from the client's capture mode (`ModbusSettings.capture_path`
+or the `anker_solix_ev.capture_traffic` service). Each request the refresh
+path sends is answered with what the charger sent back at the time,
+including timeouts, stray TIDs and dropped connections, so parser and
+coordinator changes can be compared on real traffic.
+
+    python tools/replay.py capture.bin              # original speed
+    python tools/replay.py capture.bin --speed 0    # as fast as possible
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+try:
+    from _integration import load
+    from benchmark import RefreshRunner, _pct
+except ImportError:  # imported as tools.replay
+    from tools._integration import load
+    from tools.benchmark import RefreshRunner, _pct
+
+capture = load("capture")
+modbus_client = load("modbus_client")
+
+
+async def replay(args: argparse.Namespace) -> None:
+    log = capture.ReplayLog.from_file(args.capture, args.speed)
+    client = modbus_client.AnkerModbusClient(
+        modbus_client.ModbusSettings(
+            host="replay",
+            port=0,
+            unit_id=args.unit_id,
+            address_offset=args.address_offset,
+            word_order=args.word_order,
+            response_timeout=args.timeout,
+            pipeline_depth=args.pipeline,
+            replay=log,
+        )
+    )
+    runner = RefreshRunner(client, "planned", args.word_order)
+    latencies: List[float] = []
+    failures = 0
+    wall0 = time.perf_counter()
+    while log.remaining and len(latencies) + failures < args.max_refreshes:
+        matched = log.matched
+        t0 = time.perf_counter()
+        try:
+            await runner.refresh()
+        except Exception:
+            failures += 1
+        else:
+            latencies.append(time.perf_counter() - t0)
+        if log.matched == matched:
+            break  # the refresh path no longer asks for anything in the capture
+    wall = time.perf_counter() - wall0
+    await client.close()
+
+    stats = client.stats
+    print(f"capture={args.capture} speed={args.speed or 'max'} requests={log.total}")
+    print(f"refreshes={len(latencies) + failures} failures={failures} wall={wall:.2f}s")
+    if latencies:
+        print(f"refresh mean={1000 * statistics.fmean(latencies):.2f}ms p95={1000 * _pct(latencies, 0.95):.2f}ms")
+    print(f"matched={log.matched} unmatched={log.unmatched} left={log.remaining}")
+    print(
+        f"timeouts={stats.timeouts} retries={stats.retries} reconnects={stats.reconnects} "
+        f"tid_mismatches={stats.tid_mismatches} errors={stats.errors}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="capture file written by the client's capture mode")
+    parser.add_argument("--speed", type=float, default=1.0, help="timeline scale (0 = as fast as possible)")
+    parser.add_argument("--unit-id", type=int, default=1)
+    parser.add_argument("--address-offset", type=int, default=0)
+    parser.add_argument("--word-order", choices=["hi_lo", "lo_hi"], default="hi_lo")
+    parser.add_argument("--pipeline", type=int, default=1, help="client pipeline_depth")
+    parser.add_argument("--timeout", type=float, default=2.0, help="client response timeout (s)")
+    parser.add_argument("--max-refreshes", type=int, default=100000)
+    asyncio.run(replay(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()